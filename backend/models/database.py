@@ -4,6 +4,7 @@ Supports both SQLite (development) and MySQL (production).
 """
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Database configuration
@@ -27,6 +28,10 @@ elif DATABASE_URL.startswith("mysql"):
         pool_pre_ping=True,
         pool_recycle=3600,
     )
+elif make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+    # PostgreSQL via psycopg2: batch UPDATE/DELETE executemany as well as
+    # the multi-VALUES INSERT rewriting SQLAlchemy already applies
+    engine = create_engine(DATABASE_URL, executemany_mode="values_plus_batch")
 else:
     # Other databases
     engine = create_engine(DATABASE_URL)
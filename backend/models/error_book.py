@@ -2,7 +2,7 @@
 Error book model for the AI Math Tutor system.
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 
 from backend.models.database import Base
@@ -11,11 +11,15 @@ from backend.models.database import Base
 class ErrorRecord(Base):
     """錯題本表"""
     __tablename__ = "error_records"
+    __table_args__ = (
+        # Per-student error queries, optionally bounded by created_at
+        Index("ix_error_records_student_created", "student_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True)
     student_id = Column(String, ForeignKey("students.id"))
     question_id = Column(String, ForeignKey("questions.id"))
-    session_id = Column(String, ForeignKey("sessions.id"), nullable=True)
+    session_id = Column(String, ForeignKey("sessions.id"), nullable=True, index=True)
     student_answer = Column(Text, nullable=False)
     correct_answer = Column(Text, nullable=False)
     error_type = Column(String, nullable=False)  # CALCULATION, CONCEPT, CARELESS
@@ -13,7 +13,7 @@ class LearningMetrics(Base):
     __tablename__ = "learning_metrics"
 
     id = Column(String, primary_key=True)
-    session_id = Column(String, ForeignKey("sessions.id"))
+    session_id = Column(String, ForeignKey("sessions.id"), index=True)
     wpm = Column(Float)  # Words per minute
     pause_rate = Column(Float)  # 停頓比例
     hint_dependency = Column(Float)  # 提示依賴度
@@ -30,7 +30,7 @@ class Pause(Base):
     __tablename__ = "pauses"
 
     id = Column(String, primary_key=True)
-    session_id = Column(String, ForeignKey("sessions.id"))
+    session_id = Column(String, ForeignKey("sessions.id"), index=True)
     start_time = Column(Float, nullable=False)
     end_time = Column(Float, nullable=False)
     duration = Column(Float, nullable=False)
@@ -44,7 +44,7 @@ class HintUsage(Base):
     __tablename__ = "hint_usages"
 
     id = Column(String, primary_key=True)
-    session_id = Column(String, ForeignKey("sessions.id"))
+    session_id = Column(String, ForeignKey("sessions.id"), index=True)
     hint_level = Column(Integer, nullable=False)  # 1, 2, or 3
     concept = Column(String)
     timestamp = Column(DateTime, nullable=False)
@@ -2,7 +2,7 @@
 Session and conversation models for the AI Math Tutor system.
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from backend.models.database import Base
@@ -11,6 +11,10 @@ from backend.models.database import Base
 class Session(Base):
     """學習會話表"""
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Per-student time-window filters and start_time ordering
+        Index("ix_sessions_student_start", "student_id", "start_time"),
+    )
 
     id = Column(String, primary_key=True)
     student_id = Column(String, ForeignKey("students.id"))
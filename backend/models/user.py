@@ -4,7 +4,7 @@ Supports multiple roles: admin, teacher, student, parent.
 """
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from backend.models.database import Base
@@ -65,6 +65,10 @@ class User(Base):
 class Class(Base):
     """班級資料表"""
     __tablename__ = "classes"
+    __table_args__ = (
+        # Teacher class listings ordered by created_at
+        Index("ix_classes_teacher_created", "teacher_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     class_name = Column(String(255), nullable=False)
@@ -82,6 +86,10 @@ class Class(Base):
 class ClassStudent(Base):
     """班級學生關聯表"""
     __tablename__ = "class_students"
+    __table_args__ = (
+        # Class rosters ordered by joined_at
+        Index("ix_class_students_class_joined", "class_id", "joined_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     class_id = Column(Integer, ForeignKey("classes.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -73,6 +73,22 @@ def _load_model_background():
         logger.error(f"Background model loading failed: {e}")
 
 
+def _audio_tmp_dir() -> str:
+    """
+    Pick a RAM-backed directory for temporary audio files when one is writable.
+    
+    Uploaded audio and its ffmpeg output are short-lived, so keeping them in
+    tmpfs avoids a disk write and fsync per request.
+    """
+    for candidate in ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR"), tempfile.gettempdir()):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return candidate
+    return tempfile.gettempdir()
+
+
+AUDIO_TMP_DIR = _audio_tmp_dir()
+
+
 def convert_to_wav(input_path: str, output_path: str) -> bool:
     """
     Convert audio file to WAV format using ffmpeg.
@@ -230,7 +246,7 @@ async def transcribe_audio(
     
     try:
         # Save uploaded file to temp location
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False, dir=AUDIO_TMP_DIR) as tmp_file:
             content = await audio.read()
             tmp_file.write(content)
             tmp_input_path = tmp_file.name
@@ -446,7 +462,7 @@ async def transcribe_audio_stream(
     
     try:
         # Save uploaded file
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False, dir=AUDIO_TMP_DIR) as tmp_file:
             content = await audio.read()
             tmp_file.write(content)
             tmp_input_path = tmp_file.name
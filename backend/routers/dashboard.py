@@ -8,7 +8,7 @@ Implements:
 Requirements: 10.1, 10.2
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -18,7 +18,7 @@ from backend.models.metrics import LearningMetrics
 from backend.models.session import Session as SessionModel
 from backend.models.error_book import ErrorRecord
 from backend.models.knowledge import KnowledgeNode
-from backend.models.question import Question, question_knowledge_nodes
+from backend.models.question import question_knowledge_nodes
 from backend.services.metrics_calculator import MetricsCalculator
 from backend.services.knowledge_graph import KnowledgeGraphManager
 from backend.services.error_book import ErrorBookManager
@@ -26,6 +26,9 @@ from backend.services.error_book import ErrorBookManager
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+# Rows fetched per round-trip when scanning a student's full session history
+SESSION_STREAM_BATCH_SIZE = 1000
+
 
 # Pydantic models for request/response
 class MetricsDataPoint(BaseModel):
@@ -181,10 +184,26 @@ async def get_heatmap(
     errors = error_manager.get_errors(student_id)
     
     # Get all sessions for the student to calculate concept coverage
-    sessions = db.query(SessionModel).filter(
+    sessions = db.query(
+        SessionModel.question_id,
+        SessionModel.concept_coverage
+    ).filter(
         SessionModel.student_id == student_id
     ).all()
     
+    # Knowledge node IDs per question, fetched once as sets so the per-node
+    # loops below are O(1) membership tests instead of a query per row
+    question_ids = {e.question_id for e in errors} | {s.question_id for s in sessions}
+    question_node_ids: Dict[str, Set[str]] = {}
+    if question_ids:
+        links = db.query(
+            question_knowledge_nodes.c.question_id,
+            question_knowledge_nodes.c.node_id
+        ).filter(question_knowledge_nodes.c.question_id.in_(question_ids)).all()
+        for question_id, node_id in links:
+            question_node_ids.setdefault(question_id, set()).add(node_id)
+    no_nodes: Set[str] = set()
+    
     # Build mastery data for each node
     node_mastery_list = []
     weak_areas = []
@@ -197,26 +216,16 @@ async def get_heatmap(
         
         for error in errors:
             # Check if the error's question is related to this node
-            question = db.query(Question).filter(
-                Question.id == error.question_id
-            ).first()
-            if question:
-                node_ids = [n.id for n in question.knowledge_nodes]
-                if node.id in node_ids:
-                    node_errors += 1
-                    total_attempts += 1
+            if node.id in question_node_ids.get(error.question_id, no_nodes):
+                node_errors += 1
+                total_attempts += 1
         
         # Count successful attempts (sessions with this concept covered)
         for session in sessions:
             if session.concept_coverage and session.concept_coverage > 0:
                 # Check if session's question relates to this node
-                question = db.query(Question).filter(
-                    Question.id == session.question_id
-                ).first()
-                if question:
-                    node_ids = [n.id for n in question.knowledge_nodes]
-                    if node.id in node_ids:
-                        total_attempts += 1
+                if node.id in question_node_ids.get(session.question_id, no_nodes):
+                    total_attempts += 1
         
         # Calculate mastery score
         if total_attempts > 0:
@@ -239,14 +248,9 @@ async def get_heatmap(
         node_coverage = 0.0
         coverage_count = 0
         for session in sessions:
-            question = db.query(Question).filter(
-                Question.id == session.question_id
-            ).first()
-            if question:
-                node_ids = [n.id for n in question.knowledge_nodes]
-                if node.id in node_ids and session.concept_coverage:
-                    node_coverage += session.concept_coverage
-                    coverage_count += 1
+            if node.id in question_node_ids.get(session.question_id, no_nodes) and session.concept_coverage:
+                node_coverage += session.concept_coverage
+                coverage_count += 1
         
         avg_coverage = node_coverage / coverage_count if coverage_count > 0 else 0.0
         
@@ -361,37 +365,47 @@ async def get_overview(
     """
     error_manager = ErrorBookManager(db)
     
-    # Get sessions
+    # Stream sessions in batches and accumulate in one pass, so a long
+    # history never has to be materialized in memory
     sessions = db.query(SessionModel).filter(
         SessionModel.student_id == student_id
-    ).order_by(SessionModel.start_time.desc()).all()
-    
-    total_sessions = len(sessions)
-    completed_sessions = len([s for s in sessions if s.end_time is not None])
-    
-    # Calculate average coverage
-    coverages = [s.concept_coverage for s in sessions if s.concept_coverage is not None]
-    avg_coverage = sum(coverages) / len(coverages) if coverages else 0.0
+    ).order_by(SessionModel.start_time.desc()).execution_options(
+        stream_results=True
+    ).yield_per(SESSION_STREAM_BATCH_SIZE)
     
-    # Calculate total duration
+    total_sessions = 0
+    completed_sessions = 0
+    coverage_sum = 0.0
+    coverage_count = 0
     total_duration = 0.0
+    recent_sessions = []
+    
     for s in sessions:
-        if s.start_time and s.end_time:
+        total_sessions += 1
+        if s.end_time is not None:
+            completed_sessions += 1
+        
+        if s.concept_coverage is not None:
+            coverage_sum += s.concept_coverage
+            coverage_count += 1
+        
+        if s.end_time:
             duration = (s.end_time - s.start_time).total_seconds() / 60
             total_duration += duration
+        
+        # Keep the recent sessions (top 5)
+        if len(recent_sessions) < 5:
+            recent_sessions.append(SessionSummaryResponse(
+                session_id=s.id,
+                question_id=s.question_id,
+                start_time=s.start_time,
+                end_time=s.end_time,
+                concept_coverage=s.concept_coverage or 0.0,
+                final_state=s.final_state
+            ))
     
-    # Get recent sessions (top 5)
-    recent_sessions = [
-        SessionSummaryResponse(
-            session_id=s.id,
-            question_id=s.question_id,
-            start_time=s.start_time,
-            end_time=s.end_time,
-            concept_coverage=s.concept_coverage or 0.0,
-            final_state=s.final_state
-        )
-        for s in sessions[:5]
-    ]
+    # Calculate average coverage
+    avg_coverage = coverage_sum / coverage_count if coverage_count else 0.0
     
     # Get error statistics
     error_stats = error_manager.get_error_statistics(student_id)
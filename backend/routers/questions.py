@@ -8,12 +8,14 @@ Implements:
 
 Requirements: 1.1, 1.2, 3.1
 """
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from backend.models.database import get_db
+from backend.models.question import Question
 from backend.services.question_bank import (
     QuestionBankManager,
     QuestionCriteria,
@@ -61,14 +63,53 @@ class ValidateAnswerResponse(BaseModel):
     response_time_ms: Optional[int] = None
 
 
-@router.get("", response_model=QuestionListResponse)
-async def filter_questions(
+def _to_question_response(question: Question) -> QuestionResponse:
+    """Convert a Question (with its related rows loaded) to the response model."""
+    return QuestionResponse(
+        id=question.id,
+        content=question.content,
+        type=question.type,
+        subject=question.subject,
+        unit=question.unit,
+        difficulty=question.difficulty,
+        standard_solution=question.standard_solution,
+        knowledge_nodes=[node.id for node in question.knowledge_nodes],
+        hints=[{"level": h.level, "content": h.content} for h in question.hints],
+        misconceptions=[
+            {"id": m.id, "description": m.description, "error_type": m.error_type}
+            for m in question.misconceptions
+        ]
+    )
+
+
+@lru_cache(maxsize=1024)
+def _parse_csv(value: str) -> Tuple[str, ...]:
+    """Split a comma-separated query value; cached since clients repeat the same filters."""
+    return tuple(value.split(","))
+
+
+def get_question_criteria(
     subject: Optional[str] = Query(None, description="Filter by subject"),
     unit: Optional[str] = Query(None, description="Filter by unit"),
     difficulty: Optional[int] = Query(None, ge=1, le=3, description="Filter by difficulty (1-3)"),
     question_type: Optional[str] = Query(None, description="Filter by question type"),
     knowledge_nodes: Optional[str] = Query(None, description="Comma-separated knowledge node IDs"),
     exclude_ids: Optional[str] = Query(None, description="Comma-separated question IDs to exclude"),
+) -> QuestionCriteria:
+    """Build QuestionCriteria from the query string (dependency)."""
+    return QuestionCriteria(
+        subject=subject,
+        unit=unit,
+        difficulty=difficulty,
+        knowledge_nodes=_parse_csv(knowledge_nodes) if knowledge_nodes else None,
+        exclude_ids=_parse_csv(exclude_ids) if exclude_ids else None,
+        question_type=question_type
+    )
+
+
+@router.get("", response_model=QuestionListResponse)
+async def filter_questions(
+    criteria: QuestionCriteria = Depends(get_question_criteria),
     db: Session = Depends(get_db)
 ):
     """
@@ -80,39 +121,10 @@ async def filter_questions(
     """
     manager = QuestionBankManager(db)
     
-    # Parse comma-separated values
-    node_list = knowledge_nodes.split(",") if knowledge_nodes else None
-    exclude_list = exclude_ids.split(",") if exclude_ids else None
-    
-    criteria = QuestionCriteria(
-        subject=subject,
-        unit=unit,
-        difficulty=difficulty,
-        knowledge_nodes=node_list,
-        exclude_ids=exclude_list,
-        question_type=question_type
-    )
-    
     questions = manager.filter_questions(criteria)
     
     # Convert to response format
-    question_responses = []
-    for q in questions:
-        question_responses.append(QuestionResponse(
-            id=q.id,
-            content=q.content,
-            type=q.type,
-            subject=q.subject,
-            unit=q.unit,
-            difficulty=q.difficulty,
-            standard_solution=q.standard_solution,
-            knowledge_nodes=[node.id for node in q.knowledge_nodes],
-            hints=[{"level": h.level, "content": h.content} for h in q.hints],
-            misconceptions=[
-                {"id": m.id, "description": m.description, "error_type": m.error_type}
-                for m in q.misconceptions
-            ]
-        ))
+    question_responses = [_to_question_response(q) for q in questions]
     
     return QuestionListResponse(
         questions=question_responses,
@@ -136,21 +148,7 @@ async def get_question(
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
-    return QuestionResponse(
-        id=question.id,
-        content=question.content,
-        type=question.type,
-        subject=question.subject,
-        unit=question.unit,
-        difficulty=question.difficulty,
-        standard_solution=question.standard_solution,
-        knowledge_nodes=[node.id for node in question.knowledge_nodes],
-        hints=[{"level": h.level, "content": h.content} for h in question.hints],
-        misconceptions=[
-            {"id": m.id, "description": m.description, "error_type": m.error_type}
-            for m in question.misconceptions
-        ]
-    )
+    return _to_question_response(question)
 
 
 @router.post("/validate", response_model=ValidateAnswerResponse)
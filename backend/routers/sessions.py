@@ -8,6 +8,8 @@ Implements:
 
 Requirements: 6.1
 """
+import asyncio
+import functools
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
@@ -19,6 +21,8 @@ from backend.services.dialog_engine import (
     StudentInput,
     AudioFeatures,
     ResponseType,
+    SessionNotFoundError,
+    SessionInactiveError,
 )
 from backend.services.fsm_controller import FSMState
 from backend.services.question_bank import QuestionBankManager
@@ -116,21 +120,27 @@ async def start_session(
     if question:
         question_content = question.content
         standard_solution = question.standard_solution
-        required_concepts = [node.id for node in question.knowledge_nodes]
+        required_concepts = question_manager.get_knowledge_node_ids(question.id)
     else:
         # Use default demo question
         question_content = "解方程式：2x + 5 = 13，求 x 的值。"
         standard_solution = "x = 4"
         required_concepts = ["linear-equation", "variable-isolation"]
     
-    # Create dialog engine and start session
+    # Create dialog engine and start session; the engine call takes the FSM
+    # lock and writes to the database, so it runs in a worker thread
     dialog_engine = get_dialog_engine(db)
-    session = dialog_engine.start_session(
-        question_id=request.question_id,
-        student_id=request.student_id,
-        question_content=question_content,
-        standard_solution=standard_solution,
-        required_concepts=required_concepts
+    loop = asyncio.get_running_loop()
+    session = await loop.run_in_executor(
+        None,
+        functools.partial(
+            dialog_engine.start_session,
+            question_id=request.question_id,
+            student_id=request.student_id,
+            question_content=question_content,
+            standard_solution=standard_solution,
+            required_concepts=required_concepts
+        )
     )
     
     return StartSessionResponse(
@@ -157,14 +167,6 @@ async def process_input(
     """
     dialog_engine = get_dialog_engine(db)
     
-    # Check if session exists
-    session_state = dialog_engine.get_session_state(session_id)
-    if not session_state:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    if not session_state.is_active:
-        raise HTTPException(status_code=400, detail="Session has ended")
-    
     # Create audio features if provided
     audio_features = None
     if request.audio_duration is not None:
@@ -182,8 +184,19 @@ async def process_input(
         audio_features=audio_features
     )
     
-    # Process input and get response
-    response = dialog_engine.process_student_input(student_input)
+    # Process input and get response (session lookup happens once, inside the engine).
+    # The turn blocks on LLM calls, so it runs in a worker thread to keep the event
+    # loop serving other requests.
+    loop = asyncio.get_running_loop()
+    try:
+        response = await loop.run_in_executor(
+            None,
+            functools.partial(dialog_engine.process_student_input, student_input, strict=True)
+        )
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    except SessionInactiveError:
+        raise HTTPException(status_code=400, detail="Session has ended")
     
     return TutorResponseModel(
         text=response.text,
@@ -208,12 +221,12 @@ async def end_session(
     dialog_engine = get_dialog_engine(db)
     
     # Check if session exists
-    session_state = dialog_engine.get_session_state(session_id)
-    if not session_state:
+    if not dialog_engine.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # End session and get summary
-    summary = dialog_engine.end_session(session_id)
+    # End session and get summary (off the event loop, like process_input)
+    loop = asyncio.get_running_loop()
+    summary = await loop.run_in_executor(None, dialog_engine.end_session, session_id)
     
     return EndSessionResponse(
         session_id=summary.session_id,
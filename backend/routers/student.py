@@ -6,8 +6,9 @@ import json
 from typing import Optional, List
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import func, distinct
+from sqlalchemy import func, distinct, lambda_stmt, select
 from pydantic import BaseModel
 
 from backend.models import (
@@ -17,6 +18,9 @@ from backend.models import (
 
 router = APIRouter(prefix="/student", tags=["Student"])
 
+# Rows fetched per round-trip when streaming a student's mistakes
+MISTAKES_STREAM_BATCH_SIZE = 200
+
 
 # ===== Pydantic Models =====
 
@@ -111,7 +115,7 @@ async def get_mistake_reasons(
 
 
 @router.get("/mistakes")
-async def get_student_mistakes(
+def get_student_mistakes(
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
 ):
@@ -119,8 +123,9 @@ async def get_student_mistakes(
     if not user_id:
         raise HTTPException(status_code=401, detail="未授權訪問")
     
-    # Get distinct questions with mistake reasons
-    mistakes = db.query(
+    # Get distinct questions with mistake reasons. lambda_stmt caches the
+    # compiled SQL keyed on the lambda's code; user_id becomes a bound param.
+    stmt = lambda_stmt(lambda: select(
         QuestionV2,
         Unit,
         Subject,
@@ -133,30 +138,43 @@ async def get_student_mistakes(
         Unit, QuestionV2.unit_id == Unit.id
     ).join(
         Subject, Unit.subject_id == Subject.id
-    ).filter(
+    ).where(
         MistakeReason.student_id == user_id
     ).group_by(
         MistakeReason.question_id
     ).order_by(
         func.max(MistakeReason.recorded_at).desc()
-    ).all()
+    ))
+    # The stream keeps reading from db after the handler returns; FastAPI
+    # >= 0.118 closes yield dependencies only once the response is sent
+    mistakes = db.execute(
+        stmt, execution_options={"yield_per": MISTAKES_STREAM_BATCH_SIZE}
+    )
     
-    result = []
-    for q, u, s, reason_type, reason_desc, last_recorded in mistakes:
-        result.append({
-            "id": q.id,
-            "question_text": q.question_text,
-            "answer_text": q.answer_text,
-            "solution_text": q.solution_text,
-            "difficulty": q.difficulty.value if q.difficulty else "medium",
-            "unit_name": u.unit_name,
-            "subject_name": s.subject_name,
-            "reason_type": reason_type,
-            "reason_description": reason_desc,
-            "last_recorded_at": last_recorded
-        })
+    def generate():
+        # Stream {"mistakes": [...]} row by row instead of building the full list.
+        # A sync generator makes StreamingResponse iterate it in the threadpool,
+        # so fetching each yield_per batch does not block the event loop.
+        yield b'{"mistakes":['
+        separator = b""
+        for q, u, s, reason_type, reason_desc, last_recorded in mistakes:
+            item = {
+                "id": q.id,
+                "question_text": q.question_text,
+                "answer_text": q.answer_text,
+                "solution_text": q.solution_text,
+                "difficulty": q.difficulty.value if q.difficulty else "medium",
+                "unit_name": u.unit_name,
+                "subject_name": s.subject_name,
+                "reason_type": reason_type,
+                "reason_description": reason_desc,
+                "last_recorded_at": last_recorded.isoformat() if last_recorded else None
+            }
+            yield separator + json.dumps(item, ensure_ascii=False).encode("utf-8")
+            separator = b","
+        yield b"]}"
     
-    return {"mistakes": result}
+    return StreamingResponse(generate(), media_type="application/json")
 
 
 @router.get("/stats")
@@ -169,30 +187,30 @@ async def get_student_stats(
         raise HTTPException(status_code=401, detail="未授權訪問")
     
     # Total mistakes
-    total_mistakes = db.query(
+    total_mistakes = db.scalar(lambda_stmt(lambda: select(
         func.count(distinct(MistakeReason.question_id))
-    ).filter(
+    ).where(
         MistakeReason.student_id == user_id
-    ).scalar() or 0
+    ))) or 0
     
     # Weekly mistakes
     week_ago = datetime.utcnow() - timedelta(days=7)
-    weekly_mistakes = db.query(
+    weekly_mistakes = db.scalar(lambda_stmt(lambda: select(
         func.count(distinct(MistakeReason.question_id))
-    ).filter(
+    ).where(
         MistakeReason.student_id == user_id,
         MistakeReason.recorded_at > week_ago
-    ).scalar() or 0
+    ))) or 0
     
     # Reason distribution
-    reason_dist = db.query(
+    reason_dist = db.execute(lambda_stmt(lambda: select(
         MistakeReason.reason_type,
         func.count(MistakeReason.id).label("count")
-    ).filter(
+    ).where(
         MistakeReason.student_id == user_id
     ).group_by(
         MistakeReason.reason_type
-    ).all()
+    ))).all()
     
     return {
         "totalMistakes": total_mistakes,
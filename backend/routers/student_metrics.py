@@ -8,12 +8,13 @@ Implements:
 - GET /api/student/metrics/errors - Get error analysis
 - GET /api/student/metrics/sessions - Get session history
 """
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, text
 
 from backend.models.database import get_db
 from backend.models.metrics import LearningMetrics, Pause, HintUsage
@@ -21,10 +22,17 @@ from backend.models.session import Session as SessionModel, ConversationTurn
 from backend.models.error_book import ErrorRecord
 from backend.models.knowledge import KnowledgeNode
 from backend.models.question import Question
+from backend.services.metrics_summary_cache import (
+    get_cached_summary,
+    store_summary,
+)
 
 
 router = APIRouter(prefix="/api/student/metrics", tags=["student-metrics"])
 
+# How far back get_streak_days looks for consecutive learning days
+STREAK_LOOKBACK_DAYS = 90
+
 
 # ============ Response Models ============
 
@@ -155,7 +163,7 @@ def calculate_confidence(sample_count: int, min_samples: int = 5) -> DataConfide
     else:
         message = "數據充足"
     
-    return DataConfidence(
+    return DataConfidence.model_construct(
         sample_count=sample_count,
         is_sufficient=is_sufficient,
         min_samples=min_samples,
@@ -180,23 +188,52 @@ def calculate_trend(current: float, previous: float) -> tuple[float, str]:
     return round(change, 1), direction
 
 
+def _or_uncategorized(column):
+    """SQL expression mapping NULL/empty labels to "未分類" for grouping."""
+    return func.coalesce(func.nullif(column, ""), "未分類")
+
+
+def _as_date(value) -> date:
+    """Normalize a SQL DATE() result; SQLite returns it as an ISO string."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _trend_points(days: List[str], values: np.ndarray) -> List[TrendDataPoint]:
+    """Pair days with trend values, skipping days without data (NaN)."""
+    return [
+        TrendDataPoint.model_construct(date=day, value=value)
+        for day, value, present in zip(days, values.tolist(), (~np.isnan(values)).tolist())
+        if present
+    ]
+
+
+def _duration_minutes(db: Session, start_column, end_column):
+    """SQL expression for the minutes between two datetime columns."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return (func.julianday(end_column) - func.julianday(start_column)) * 1440
+    if dialect == "mysql":
+        return func.timestampdiff(text("SECOND"), start_column, end_column) / 60
+    return func.extract("epoch", end_column - start_column) / 60
+
+
 def get_streak_days(db: Session, student_id: str) -> int:
     """Calculate consecutive learning days."""
-    sessions = db.query(SessionModel).filter(
-        SessionModel.student_id == student_id
-    ).order_by(SessionModel.start_time.desc()).all()
-    
-    if not sessions:
+    # A streak can be at most as long as the lookback window
+    since = datetime.utcnow() - timedelta(days=STREAK_LOOKBACK_DAYS)
+    rows = db.query(func.date(SessionModel.start_time)).filter(
+        SessionModel.student_id == student_id,
+        SessionModel.start_time >= since
+    ).distinct().all()
+    
+    if not rows:
         return 0
     
     streak = 0
     current_date = datetime.utcnow().date()
     
     # Get unique dates
-    session_dates = set()
-    for s in sessions:
-        if s.start_time:
-            session_dates.add(s.start_time.date())
+    session_dates = {_as_date(day) for (day,) in rows}
     
     # Count consecutive days
     while current_date in session_dates or (current_date - timedelta(days=1)) in session_dates:
@@ -212,7 +249,7 @@ def get_streak_days(db: Session, student_id: str) -> int:
 # ============ API Endpoints ============
 
 @router.get("/summary", response_model=MetricsSummaryResponse)
-async def get_metrics_summary(
+def get_metrics_summary(
     student_id: str = Query(..., description="Student ID"),
     db: Session = Depends(get_db)
 ):
@@ -220,82 +257,97 @@ async def get_metrics_summary(
     Get comprehensive KPI summary for a student.
     All data comes from real database records.
     """
+    cached = get_cached_summary(student_id)
+    if cached is not None:
+        return cached
+    
+    summary = _build_metrics_summary(db, student_id)
+    store_summary(student_id, summary)
+    return summary
+
+
+def _build_metrics_summary(db: Session, student_id: str) -> MetricsSummaryResponse:
+    """Compute the KPI summary for a student from the database."""
     now = datetime.utcnow()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_ago = now - timedelta(days=7)
     two_weeks_ago = now - timedelta(days=14)
     
-    # Get all sessions for this student
-    all_sessions = db.query(SessionModel).filter(
+    # Session KPIs in one aggregate query
+    last_week = and_(SessionModel.start_time >= two_weeks_ago, SessionModel.start_time < week_ago)
+    is_correct = SessionModel.concept_coverage >= 0.8
+    session_stats = db.query(
+        func.count(SessionModel.id).label("total_sessions"),
+        func.count(SessionModel.concept_coverage).label("total_questions"),
+        func.sum(case((is_correct, 1), else_=0)).label("correct_questions"),
+        func.sum(case((last_week, 1), else_=0)).label("prev_total"),
+        func.sum(case((and_(last_week, is_correct), 1), else_=0)).label("prev_correct"),
+        func.sum(case((SessionModel.start_time >= today_start, 1), else_=0)).label("today_sessions"),
+        func.sum(_duration_minutes(db, SessionModel.start_time, SessionModel.end_time)).label("total_time"),
+    ).filter(
         SessionModel.student_id == student_id
-    ).all()
-    
-    # Get sessions from this week and last week for trend calculation
-    this_week_sessions = [s for s in all_sessions if s.start_time and s.start_time >= week_ago]
-    last_week_sessions = [s for s in all_sessions if s.start_time and two_weeks_ago <= s.start_time < week_ago]
-    today_sessions = [s for s in all_sessions if s.start_time and s.start_time >= today_start]
-    
-    # Get metrics for sessions
-    session_ids = [s.id for s in all_sessions]
-    metrics_list = db.query(LearningMetrics).filter(
-        LearningMetrics.session_id.in_(session_ids)
-    ).all() if session_ids else []
-    
-    this_week_metrics = [m for m in metrics_list if m.session_id in [s.id for s in this_week_sessions]]
-    last_week_metrics = [m for m in metrics_list if m.session_id in [s.id for s in last_week_sessions]]
+    ).one()
+    
+    # Learning metrics KPIs in one aggregate query, bucketed by session date
+    has_wpm = LearningMetrics.wpm > 0
+    metrics_stats = db.query(
+        func.avg(case((has_wpm, LearningMetrics.wpm))).label("avg_wpm"),
+        func.count(case((has_wpm, 1))).label("wpm_count"),
+        func.avg(case((and_(has_wpm, last_week), LearningMetrics.wpm))).label("prev_avg_wpm"),
+        func.sum(case(
+            (SessionModel.start_time >= today_start, LearningMetrics.focus_duration)
+        )).label("focus_today"),
+        func.avg(LearningMetrics.hint_dependency).label("avg_hint_dep"),
+        func.count(LearningMetrics.hint_dependency).label("hint_dep_count"),
+        func.avg(LearningMetrics.pause_rate).label("avg_pause"),
+        func.count(LearningMetrics.pause_rate).label("pause_count"),
+        func.avg(LearningMetrics.concept_coverage).label("avg_coverage"),
+        func.count(LearningMetrics.concept_coverage).label("coverage_count"),
+    ).join(
+        SessionModel, SessionModel.id == LearningMetrics.session_id
+    ).filter(
+        SessionModel.student_id == student_id
+    ).one()
     
-    # Get error records
-    errors = db.query(ErrorRecord).filter(
+    # Error KPIs in one aggregate query
+    error_stats = db.query(
+        func.count(ErrorRecord.id).label("total_errors"),
+        func.sum(case((ErrorRecord.recurrence_count > 0, 1), else_=0)).label("recurring_errors"),
+    ).filter(
         ErrorRecord.student_id == student_id
-    ).all()
+    ).one()
     
     # Calculate accuracy rate
-    total_questions = sum(1 for s in all_sessions if s.concept_coverage is not None)
-    correct_questions = sum(1 for s in all_sessions if s.concept_coverage and s.concept_coverage >= 0.8)
+    total_questions = session_stats.total_questions
+    correct_questions = int(session_stats.correct_questions or 0)
     current_accuracy = correct_questions / total_questions if total_questions > 0 else 0.0
     
     # Previous period accuracy
-    prev_total = len(last_week_sessions)
-    prev_correct = sum(1 for s in last_week_sessions if s.concept_coverage and s.concept_coverage >= 0.8)
+    prev_total = int(session_stats.prev_total or 0)
+    prev_correct = int(session_stats.prev_correct or 0)
     prev_accuracy = prev_correct / prev_total if prev_total > 0 else 0.0
     
     accuracy_trend, accuracy_dir = calculate_trend(current_accuracy, prev_accuracy)
     
     # Calculate average WPM
-    wpm_values = [m.wpm for m in metrics_list if m.wpm and m.wpm > 0]
-    current_wpm = sum(wpm_values) / len(wpm_values) if wpm_values else 0.0
-    
-    prev_wpm_values = [m.wpm for m in last_week_metrics if m.wpm and m.wpm > 0]
-    prev_wpm = sum(prev_wpm_values) / len(prev_wpm_values) if prev_wpm_values else 0.0
+    current_wpm = float(metrics_stats.avg_wpm or 0.0)
+    prev_wpm = float(metrics_stats.prev_avg_wpm or 0.0)
     
     wpm_trend, wpm_dir = calculate_trend(current_wpm, prev_wpm)
     
     # Calculate error recurrence rate
-    total_errors = len(errors)
-    recurring_errors = sum(1 for e in errors if e.recurrence_count and e.recurrence_count > 0)
+    total_errors = error_stats.total_errors
+    recurring_errors = int(error_stats.recurring_errors or 0)
     recurrence_rate = recurring_errors / total_errors if total_errors > 0 else 0.0
     
-    # Calculate focus duration today
-    focus_today = sum(m.focus_duration or 0 for m in metrics_list 
-                      if m.session_id in [s.id for s in today_sessions])
-    
-    # Calculate hint dependency
-    hint_deps = [m.hint_dependency for m in metrics_list if m.hint_dependency is not None]
-    avg_hint_dep = sum(hint_deps) / len(hint_deps) if hint_deps else 0.0
-    
-    # Calculate pause ratio
-    pause_rates = [m.pause_rate for m in metrics_list if m.pause_rate is not None]
-    avg_pause = sum(pause_rates) / len(pause_rates) if pause_rates else 0.0
-    
-    # Calculate concept coverage
-    coverages = [m.concept_coverage for m in metrics_list if m.concept_coverage is not None]
-    avg_coverage = sum(coverages) / len(coverages) if coverages else 0.0
+    # Focus duration today, hint dependency, pause ratio and concept coverage
+    focus_today = float(metrics_stats.focus_today or 0.0)
+    avg_hint_dep = float(metrics_stats.avg_hint_dep or 0.0)
+    avg_pause = float(metrics_stats.avg_pause or 0.0)
+    avg_coverage = float(metrics_stats.avg_coverage or 0.0)
     
     # Calculate total practice time
-    total_time = 0.0
-    for s in all_sessions:
-        if s.start_time and s.end_time:
-            total_time += (s.end_time - s.start_time).total_seconds() / 60
+    total_time = float(session_stats.total_time or 0.0)
     
     # Get streak days
     streak = get_streak_days(db, student_id)
@@ -303,63 +355,63 @@ async def get_metrics_summary(
     return MetricsSummaryResponse(
         student_id=student_id,
         generated_at=now,
-        accuracy_rate=KPIValue(
+        accuracy_rate=KPIValue.model_construct(
             value=round(current_accuracy * 100, 1),
             unit="%",
             trend=accuracy_trend,
             trend_direction=accuracy_dir,
             confidence=calculate_confidence(total_questions)
         ),
-        avg_wpm=KPIValue(
+        avg_wpm=KPIValue.model_construct(
             value=round(current_wpm, 0),
             unit="字/分鐘",
             trend=wpm_trend,
             trend_direction=wpm_dir,
-            confidence=calculate_confidence(len(wpm_values))
+            confidence=calculate_confidence(metrics_stats.wpm_count)
         ),
-        error_recurrence_rate=KPIValue(
+        error_recurrence_rate=KPIValue.model_construct(
             value=round(recurrence_rate * 100, 1),
             unit="%",
             trend=None,
             trend_direction=None,
             confidence=calculate_confidence(total_errors)
         ),
-        focus_duration_today=KPIValue(
+        focus_duration_today=KPIValue.model_construct(
             value=round(focus_today / 60, 0),  # Convert to minutes
             unit="分鐘",
             trend=None,
             trend_direction=None,
-            confidence=calculate_confidence(len(today_sessions))
+            confidence=calculate_confidence(session_stats.today_sessions or 0)
         ),
-        total_sessions=len(all_sessions),
+        total_sessions=session_stats.total_sessions,
         total_practice_time_minutes=round(total_time, 0),
         streak_days=streak,
-        hint_dependency=KPIValue(
+        hint_dependency=KPIValue.model_construct(
             value=round(avg_hint_dep * 100, 1),
             unit="%",
             trend=None,
             trend_direction=None,
-            confidence=calculate_confidence(len(hint_deps))
+            confidence=calculate_confidence(metrics_stats.hint_dep_count)
         ),
-        pause_ratio=KPIValue(
+        pause_ratio=KPIValue.model_construct(
             value=round(avg_pause * 100, 1),
             unit="%",
             trend=None,
             trend_direction=None,
-            confidence=calculate_confidence(len(pause_rates))
+            confidence=calculate_confidence(metrics_stats.pause_count)
         ),
-        concept_coverage=KPIValue(
+        concept_coverage=KPIValue.model_construct(
             value=round(avg_coverage * 100, 1),
             unit="%",
             trend=None,
             trend_direction=None,
-            confidence=calculate_confidence(len(coverages))
+            confidence=calculate_confidence(metrics_stats.coverage_count)
         )
     )
 
 
 @router.get("/trends", response_model=TrendsResponse)
-async def get_metrics_trends(
+def get_metrics_trends(
     student_id: str = Query(..., description="Student ID"),
     period: str = Query("week", description="Period: week, month, all"),
     db: Session = Depends(get_db)
@@ -378,105 +430,62 @@ async def get_metrics_trends(
     else:
         start_date = datetime.min
     
-    # Get sessions in range
-    sessions = db.query(SessionModel).filter(
-        and_(
-            SessionModel.student_id == student_id,
-            SessionModel.start_time >= start_date
-        )
-    ).order_by(SessionModel.start_time).all()
-    
-    session_ids = [s.id for s in sessions]
-    metrics_list = db.query(LearningMetrics).filter(
-        LearningMetrics.session_id.in_(session_ids)
-    ).all() if session_ids else []
-    
-    # Build metrics lookup
-    metrics_by_session = {m.session_id: m for m in metrics_list}
-    
-    # Group by date
-    daily_data: Dict[str, Dict[str, Any]] = {}
+    in_period = and_(
+        SessionModel.student_id == student_id,
+        SessionModel.start_time >= start_date
+    )
     
-    for session in sessions:
-        if not session.start_time:
-            continue
-        
-        date_str = session.start_time.strftime("%Y-%m-%d")
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                "accuracy_values": [],
-                "wpm_values": [],
-                "focus_values": [],
-                "session_count": 0
-            }
-        
-        daily_data[date_str]["session_count"] += 1
-        
-        if session.concept_coverage is not None:
-            daily_data[date_str]["accuracy_values"].append(session.concept_coverage)
-        
-        metrics = metrics_by_session.get(session.id)
-        if metrics:
-            if metrics.wpm:
-                daily_data[date_str]["wpm_values"].append(metrics.wpm)
-            if metrics.focus_duration:
-                daily_data[date_str]["focus_values"].append(metrics.focus_duration)
-    
-    # Build trend data points
-    accuracy_trend = []
-    wpm_trend = []
-    focus_trend = []
-    sessions_by_day = []
-    
-    for date_str in sorted(daily_data.keys()):
-        data = daily_data[date_str]
-        
-        # Accuracy trend
-        if data["accuracy_values"]:
-            avg_acc = sum(data["accuracy_values"]) / len(data["accuracy_values"])
-            accuracy_trend.append(TrendDataPoint(
-                date=date_str,
-                value=round(avg_acc * 100, 1)
-            ))
-        
-        # WPM trend
-        if data["wpm_values"]:
-            avg_wpm = sum(data["wpm_values"]) / len(data["wpm_values"])
-            wpm_trend.append(TrendDataPoint(
-                date=date_str,
-                value=round(avg_wpm, 0)
-            ))
-        
-        # Focus trend
-        if data["focus_values"]:
-            total_focus = sum(data["focus_values"]) / 60  # Convert to minutes
-            focus_trend.append(TrendDataPoint(
-                date=date_str,
-                value=round(total_focus, 0)
-            ))
-        
-        # Sessions by day
-        sessions_by_day.append(TrendDataPoint(
-            date=date_str,
-            value=data["session_count"]
-        ))
+    # Collapse metrics to one row per session first so sessions with several
+    # metrics rows are not weighted more than once in the daily averages
+    session_metrics = db.query(
+        LearningMetrics.session_id.label("session_id"),
+        func.avg(case((LearningMetrics.wpm != 0, LearningMetrics.wpm))).label("wpm"),
+        func.sum(case(
+            (LearningMetrics.focus_duration != 0, LearningMetrics.focus_duration)
+        )).label("focus_duration")
+    ).filter(
+        LearningMetrics.session_id.in_(db.query(SessionModel.id).filter(in_period))
+    ).group_by(LearningMetrics.session_id).subquery()
+    
+    # Aggregate sessions and their metrics per day in SQL
+    day = func.date(SessionModel.start_time).label("day")
+    daily_rows = db.query(
+        day,
+        func.avg(SessionModel.concept_coverage).label("avg_accuracy"),
+        func.avg(session_metrics.c.wpm).label("avg_wpm"),
+        func.sum(session_metrics.c.focus_duration).label("total_focus"),
+        func.count(SessionModel.id).label("session_count")
+    ).outerjoin(
+        session_metrics, session_metrics.c.session_id == SessionModel.id
+    ).filter(in_period).group_by(day).order_by(day).all()
+    
+    # Build trend data points with vectorized rounding; missing
+    # aggregates become NaN and are left out of their trend
+    days = [_as_date(row.day).isoformat() for row in daily_rows]
+    accuracy = np.array([row.avg_accuracy for row in daily_rows], dtype=np.float64)
+    wpm = np.array([row.avg_wpm for row in daily_rows], dtype=np.float64)
+    focus = np.array([row.total_focus for row in daily_rows], dtype=np.float64)
+    session_counts = np.array([row.session_count for row in daily_rows], dtype=np.float64)
+    
+    accuracy_trend = _trend_points(days, np.round(accuracy * 100, 1))
+    wpm_trend = _trend_points(days, np.round(wpm, 0))
+    focus_trend = _trend_points(days, np.round(focus / 60, 0))  # Convert to minutes
+    sessions_by_day = _trend_points(days, session_counts)
+    total_sessions = int(session_counts.sum())
     
     # Get errors by unit
-    errors = db.query(ErrorRecord).filter(
+    unit = _or_uncategorized(ErrorRecord.unit)
+    error_count = func.count(ErrorRecord.id)
+    unit_errors = db.query(unit, error_count).filter(
         and_(
             ErrorRecord.student_id == student_id,
             ErrorRecord.created_at >= start_date
         )
-    ).all()
-    
-    unit_errors: Dict[str, int] = {}
-    for error in errors:
-        unit = error.unit or "未分類"
-        unit_errors[unit] = unit_errors.get(unit, 0) + 1
+    ).group_by(unit).order_by(error_count.desc()).all()
     
     errors_by_unit = [
-        TrendDataPoint(date=unit, value=count, label=unit)
-        for unit, count in sorted(unit_errors.items(), key=lambda x: -x[1])
+        TrendDataPoint.model_construct(date=unit_name, value=float(count), label=unit_name)
+        for unit_name, count in unit_errors
     ]
     
     return TrendsResponse(
@@ -487,65 +496,63 @@ async def get_metrics_trends(
         focus_trend=focus_trend,
         sessions_by_day=sessions_by_day,
         errors_by_unit=errors_by_unit,
-        confidence=calculate_confidence(len(sessions))
+        confidence=calculate_confidence(total_sessions)
     )
 
 
 @router.get("/errors", response_model=ErrorAnalysisResponse)
-async def get_error_analysis(
+def get_error_analysis(
     student_id: str = Query(..., description="Student ID"),
     db: Session = Depends(get_db)
 ):
     """
     Get detailed error analysis including recurrence rates.
     """
-    errors = db.query(ErrorRecord).filter(
-        ErrorRecord.student_id == student_id
-    ).all()
+    by_student = ErrorRecord.student_id == student_id
+    error_type = _or_uncategorized(ErrorRecord.error_type)
+    unit = _or_uncategorized(ErrorRecord.unit)
+    
+    totals = db.query(
+        func.count(ErrorRecord.id).label("total_errors"),
+        func.sum(case((ErrorRecord.is_repaired, 1), else_=0)).label("repaired_errors")
+    ).filter(by_student).one()
     
-    total_errors = len(errors)
-    repaired_errors = sum(1 for e in errors if e.is_repaired)
+    total_errors = totals.total_errors
+    repaired_errors = totals.repaired_errors or 0
     repair_rate = repaired_errors / total_errors if total_errors > 0 else 0.0
     
     # Group errors by type
-    errors_by_type_dict: Dict[str, Dict[str, Any]] = {}
-    for error in errors:
-        error_type = error.error_type or "未分類"
-        if error_type not in errors_by_type_dict:
-            errors_by_type_dict[error_type] = {
-                "count": 0,
-                "recurrence_count": 0,
-                "concepts": set(),
-                "last_occurrence": None
-            }
-        
-        errors_by_type_dict[error_type]["count"] += 1
-        if error.recurrence_count and error.recurrence_count > 0:
-            errors_by_type_dict[error_type]["recurrence_count"] += 1
-        if error.concept:
-            errors_by_type_dict[error_type]["concepts"].add(error.concept)
-        if error.created_at:
-            current_last = errors_by_type_dict[error_type]["last_occurrence"]
-            if current_last is None or error.created_at > current_last:
-                errors_by_type_dict[error_type]["last_occurrence"] = error.created_at
+    type_rows = db.query(
+        error_type.label("error_type"),
+        func.count(ErrorRecord.id).label("count"),
+        func.sum(case((ErrorRecord.recurrence_count > 0, 1), else_=0)).label("recurrence_count"),
+        func.max(ErrorRecord.created_at).label("last_occurrence")
+    ).filter(by_student).group_by(error_type).all()
+    
+    concepts_by_type: Dict[str, List[str]] = {}
+    for type_name, concept in db.query(error_type, ErrorRecord.concept).filter(
+        by_student,
+        ErrorRecord.concept.isnot(None),
+        ErrorRecord.concept != ""
+    ).distinct():
+        concepts_by_type.setdefault(type_name, []).append(concept)
     
     errors_by_type = [
         ErrorAnalysisItem(
-            error_type=error_type,
-            count=data["count"],
-            recurrence_count=data["recurrence_count"],
-            recurrence_rate=data["recurrence_count"] / data["count"] if data["count"] > 0 else 0.0,
-            related_concepts=list(data["concepts"]),
-            last_occurrence=data["last_occurrence"]
+            error_type=row.error_type,
+            count=row.count,
+            recurrence_count=row.recurrence_count,
+            recurrence_rate=row.recurrence_count / row.count if row.count > 0 else 0.0,
+            related_concepts=concepts_by_type.get(row.error_type, []),
+            last_occurrence=row.last_occurrence
         )
-        for error_type, data in errors_by_type_dict.items()
+        for row in type_rows
     ]
     
     # Group errors by unit
-    errors_by_unit: Dict[str, int] = {}
-    for error in errors:
-        unit = error.unit or "未分類"
-        errors_by_unit[unit] = errors_by_unit.get(unit, 0) + 1
+    errors_by_unit: Dict[str, int] = dict(
+        db.query(unit, func.count(ErrorRecord.id)).filter(by_student).group_by(unit).all()
+    )
     
     # Get recurring errors
     recurring_errors = [e for e in errors_by_type if e.recurrence_rate > 0]
@@ -564,7 +571,7 @@ async def get_error_analysis(
 
 
 @router.get("/sessions", response_model=SessionHistoryResponse)
-async def get_session_history(
+def get_session_history(
     student_id: str = Query(..., description="Student ID"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=50, description="Items per page"),
@@ -573,74 +580,88 @@ async def get_session_history(
     """
     Get paginated session history with detailed metrics.
     """
-    # Get total count
-    total_count = db.query(SessionModel).filter(
+    # One metrics row per session: a session can hold several LearningMetrics
+    # rows, which would otherwise duplicate it in the page and the total count.
+    # Hint and error counts are grouped per session the same way.
+    student_sessions = db.query(SessionModel.id).filter(
         SessionModel.student_id == student_id
-    ).count()
-    
-    # Get paginated sessions
+    )
+    session_metrics = db.query(
+        LearningMetrics.session_id.label("session_id"),
+        func.avg(LearningMetrics.wpm).label("wpm"),
+        func.avg(LearningMetrics.pause_rate).label("pause_rate")
+    ).filter(
+        LearningMetrics.session_id.in_(student_sessions)
+    ).group_by(LearningMetrics.session_id).subquery()
+    hint_counts = db.query(
+        HintUsage.session_id.label("session_id"),
+        func.count(HintUsage.id).label("hint_count")
+    ).filter(
+        HintUsage.session_id.in_(student_sessions)
+    ).group_by(HintUsage.session_id).subquery()
+    error_counts = db.query(
+        ErrorRecord.session_id.label("session_id"),
+        func.count(ErrorRecord.id).label("error_count")
+    ).filter(
+        ErrorRecord.session_id.in_(student_sessions)
+    ).group_by(ErrorRecord.session_id).subquery()
+    
+    # Fetch the page with its metrics, question and counts in one query,
+    # taking the total count from a window aggregate
     offset = (page - 1) * page_size
-    sessions = db.query(SessionModel).filter(
+    rows = db.query(
+        SessionModel.id,
+        SessionModel.start_time,
+        SessionModel.end_time,
+        SessionModel.concept_coverage,
+        session_metrics.c.wpm,
+        session_metrics.c.pause_rate,
+        Question.unit,
+        Question.subject,
+        hint_counts.c.hint_count,
+        error_counts.c.error_count,
+        func.count().over().label("total_count")
+    ).outerjoin(
+        session_metrics, session_metrics.c.session_id == SessionModel.id
+    ).outerjoin(
+        Question, Question.id == SessionModel.question_id
+    ).outerjoin(
+        hint_counts, hint_counts.c.session_id == SessionModel.id
+    ).outerjoin(
+        error_counts, error_counts.c.session_id == SessionModel.id
+    ).filter(
         SessionModel.student_id == student_id
     ).order_by(SessionModel.start_time.desc()).offset(offset).limit(page_size).all()
     
-    # Get metrics for these sessions
-    session_ids = [s.id for s in sessions]
-    metrics_list = db.query(LearningMetrics).filter(
-        LearningMetrics.session_id.in_(session_ids)
-    ).all() if session_ids else []
-    metrics_by_session = {m.session_id: m for m in metrics_list}
-    
-    # Get hint counts
-    hint_counts = {}
-    if session_ids:
-        hint_results = db.query(
-            HintUsage.session_id,
-            func.count(HintUsage.id).label("count")
-        ).filter(
-            HintUsage.session_id.in_(session_ids)
-        ).group_by(HintUsage.session_id).all()
-        hint_counts = {r.session_id: r.count for r in hint_results}
-    
-    # Get error counts
-    error_counts = {}
-    if session_ids:
-        error_results = db.query(
-            ErrorRecord.session_id,
-            func.count(ErrorRecord.id).label("count")
-        ).filter(
-            ErrorRecord.session_id.in_(session_ids)
-        ).group_by(ErrorRecord.session_id).all()
-        error_counts = {r.session_id: r.count for r in error_results}
+    if rows:
+        total_count = rows[0].total_count
+    elif offset > 0:
+        # Page past the end: no row carries the window count
+        total_count = student_sessions.count()
+    else:
+        total_count = 0
     
     # Build response items
     items = []
-    for session in sessions:
-        # Get question info
-        question = db.query(Question).filter(
-            Question.id == session.question_id
-        ).first()
-        
+    for row in rows:
         # Calculate duration
         duration = 0.0
-        if session.start_time and session.end_time:
-            duration = (session.end_time - session.start_time).total_seconds() / 60
-        
-        metrics = metrics_by_session.get(session.id)
+        if row.end_time:
+            duration = (row.end_time - row.start_time).total_seconds() / 60
         
         items.append(SessionHistoryItem(
-            session_id=session.id,
-            date=session.start_time or datetime.utcnow(),
-            unit=question.unit if question else "未知",
-            subject=question.subject if question else "數學",
+            session_id=row.id,
+            date=row.start_time,
+            unit=row.unit or "未知",
+            subject=row.subject or "數學",
             mode="講題模式",  # Default mode
             duration_minutes=round(duration, 1),
-            correct_rate=session.concept_coverage or 0.0,
-            wpm=metrics.wpm if metrics else None,
-            pause_ratio=metrics.pause_rate if metrics else None,
-            hint_used=hint_counts.get(session.id, 0),
+            correct_rate=row.concept_coverage or 0.0,
+            wpm=row.wpm,
+            pause_ratio=row.pause_rate,
+            hint_used=row.hint_count or 0,
             questions_count=1,  # One question per session
-            mistakes_count=error_counts.get(session.id, 0)
+            mistakes_count=row.error_count or 0
         ))
     
     return SessionHistoryResponse(
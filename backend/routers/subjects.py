@@ -1,20 +1,57 @@
 """
 Subjects and Units router for the AI Math Tutor system.
 """
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.orm import Session as DBSession, joinedload
 
 from backend.models import get_db, Subject, Unit
 
 router = APIRouter(tags=["Subjects"])
 
+# Subjects and units only change through the seeding scripts, so the
+# assembled responses are cached in-process for a short time.
+CATALOG_CACHE_TTL_SECONDS = 60.0
+
+_catalog_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_catalog_cache_lock = threading.Lock()
+
+
+def _get_cached(key: str) -> Optional[Dict[str, Any]]:
+    """Return a cached catalog response if it has not expired."""
+    with _catalog_cache_lock:
+        entry = _catalog_cache.get(key)
+    if entry and time.monotonic() - entry[0] < CATALOG_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+def _set_cached(key: str, value: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a catalog response and return it."""
+    with _catalog_cache_lock:
+        _catalog_cache[key] = (time.monotonic(), value)
+    return value
+
+
+def clear_catalog_cache() -> None:
+    """Drop cached catalog responses (call after changing subjects or units)."""
+    with _catalog_cache_lock:
+        _catalog_cache.clear()
+
 
 @router.get("/subjects")
-async def get_subjects(db: DBSession = Depends(get_db)):
+def get_subjects(db: DBSession = Depends(get_db)):
     """Get all subjects."""
+    cached = _get_cached("subjects")
+    if cached is not None:
+        return cached
+    
     subjects = db.query(Subject).all()
     
-    return {
+    return _set_cached("subjects", {
         "subjects": [
             {
                 "id": s.id,
@@ -23,15 +60,20 @@ async def get_subjects(db: DBSession = Depends(get_db)):
             }
             for s in subjects
         ]
-    }
+    })
 
 
 @router.get("/units")
-async def get_units(db: DBSession = Depends(get_db)):
+def get_units(db: DBSession = Depends(get_db)):
     """Get all units with subject information."""
-    units = db.query(Unit).join(Subject).all()
+    cached = _get_cached("units")
+    if cached is not None:
+        return cached
+    
+    # innerjoin keeps the previous JOIN semantics and populates u.subject
+    units = db.query(Unit).options(joinedload(Unit.subject, innerjoin=True)).all()
     
-    return {
+    return _set_cached("units", {
         "units": [
             {
                 "id": u.id,
@@ -41,4 +83,4 @@ async def get_units(db: DBSession = Depends(get_db)):
             }
             for u in units
         ]
-    }
+    })
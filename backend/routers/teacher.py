@@ -5,13 +5,16 @@ Handles class management and question import.
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from pydantic import BaseModel
 
 from backend.models import get_db, User, Class, ClassStudent, Subject, Unit, QuestionV2, Difficulty
 
 router = APIRouter(prefix="/teacher", tags=["Teacher"])
 
+# Difficulty lookup by value; unknown values fall back to MEDIUM on import
+_DIFFICULTY_BY_VALUE = {d.value: d for d in Difficulty}
+
 
 # ===== Pydantic Models =====
 
@@ -48,7 +51,7 @@ def get_current_user_id(user_id: Optional[str] = Header(None, alias="user-id"))
 # ===== Routes =====
 
 @router.get("/classes")
-async def get_teacher_classes(
+def get_teacher_classes(
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
 ):
@@ -85,7 +88,7 @@ async def get_teacher_classes(
 
 
 @router.post("/classes")
-async def create_class(
+def create_class(
     request: CreateClassRequest,
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
@@ -114,7 +117,7 @@ async def create_class(
 
 
 @router.delete("/classes/{class_id}")
-async def delete_class(
+def delete_class(
     class_id: int,
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
@@ -135,7 +138,7 @@ async def delete_class(
 
 
 @router.get("/classes/{class_id}/students")
-async def get_class_students(
+def get_class_students(
     class_id: int,
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
@@ -174,7 +177,7 @@ async def get_class_students(
 
 
 @router.delete("/classes/{class_id}/students/{student_id}")
-async def remove_student_from_class(
+def remove_student_from_class(
     class_id: int,
     student_id: int,
     user_id: Optional[int] = Depends(get_current_user_id),
@@ -201,7 +204,7 @@ async def remove_student_from_class(
 
 
 @router.post("/questions/import")
-async def import_questions(
+def import_questions(
     request: ImportQuestionsRequest,
     user_id: Optional[int] = Depends(get_current_user_id),
     db: DBSession = Depends(get_db)
@@ -218,29 +221,27 @@ async def import_questions(
     if not unit:
         raise HTTPException(status_code=404, detail="單元不存在")
     
-    imported_count = 0
+    rows = []
     
     for q in request.questions:
         if q.question_text and q.answer_text:
             # Determine difficulty
             diff_str = q.difficulty or request.difficulty or "medium"
-            try:
-                difficulty = Difficulty(diff_str)
-            except ValueError:
-                difficulty = Difficulty.MEDIUM
-            
-            new_question = QuestionV2(
-                unit_id=request.unit_id,
-                question_text=q.question_text,
-                answer_text=q.answer_text,
-                solution_text=q.solution_text,
-                difficulty=difficulty
-            )
+            difficulty = _DIFFICULTY_BY_VALUE.get(diff_str, Difficulty.MEDIUM)
             
-            db.add(new_question)
-            imported_count += 1
-    
+            rows.append({
+                "unit_id": request.unit_id,
+                "question_text": q.question_text,
+                "answer_text": q.answer_text,
+                "solution_text": q.solution_text,
+                "difficulty": difficulty
+            })
+    
+    # Single executemany INSERT instead of per-object unit-of-work flushes
+    if rows:
+        db.execute(insert(QuestionV2), rows)
     db.commit()
+    imported_count = len(rows)
     
     return {
         "message": f"成功匯入 {imported_count} 條題目",
@@ -9,6 +9,45 @@ import os
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ai_math_tutor.db")
 
 
+def _add_columns(conn, columns):
+    """
+    Add columns to error_records in one transaction.
+    
+    All ALTERs are first submitted as a single script. If SQLite rejects one
+    (e.g. a non-constant default on a populated table), the script is rolled back
+    and the columns are retried one by one inside savepoints, so only the
+    rejected ones are skipped. Returns {column_name: error} for skipped columns.
+    """
+    statements = [
+        f"ALTER TABLE error_records ADD COLUMN {col_name} {col_def};"
+        for col_name, col_def in columns
+    ]
+    try:
+        conn.executescript("BEGIN IMMEDIATE;\n" + "\n".join(statements) + "\nCOMMIT;")
+        return {}
+    except sqlite3.OperationalError:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    
+    errors = {}
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for (col_name, _), sql in zip(columns, statements):
+            cursor.execute("SAVEPOINT add_column")
+            try:
+                cursor.execute(sql)
+            except sqlite3.OperationalError as e:
+                cursor.execute("ROLLBACK TO add_column")
+                errors[col_name] = e
+            cursor.execute("RELEASE add_column")
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    return errors
+
+
 def migrate():
     """Add missing columns to error_records table."""
     print(f"Migrating database: {DB_PATH}")
@@ -17,8 +56,11 @@ def migrate():
         print("Database file not found. It will be created on first run.")
         return
     
-    conn = sqlite3.connect(DB_PATH)
+    # Autocommit mode so the transaction below is managed explicitly
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
     
     # Get existing columns
     cursor.execute("PRAGMA table_info(error_records)")
@@ -35,20 +77,25 @@ def migrate():
         ("recurrence_count", "INTEGER DEFAULT 0"),
     ]
     
+    missing = []
     for col_name, col_def in new_columns:
-        if col_name not in existing_columns:
-            try:
-                sql = f"ALTER TABLE error_records ADD COLUMN {col_name} {col_def}"
-                print(f"Adding column: {col_name}")
-                cursor.execute(sql)
-                print(f"  ✓ Added {col_name}")
-            except sqlite3.OperationalError as e:
-                print(f"  ✗ Error adding {col_name}: {e}")
-        else:
+        if col_name in existing_columns:
             print(f"  - Column {col_name} already exists")
+        else:
+            missing.append((col_name, col_def))
+    
+    try:
+        if missing:
+            print(f"Adding columns: {', '.join(name for name, _ in missing)}")
+            errors = _add_columns(conn, missing)
+            for col_name, _ in missing:
+                if col_name in errors:
+                    print(f"  ✗ Error adding {col_name}: {errors[col_name]}")
+                else:
+                    print(f"  ✓ Added {col_name}")
+    finally:
+        conn.close()
     
-    conn.commit()
-    conn.close()
     print("\nMigration complete!")
 
 
@@ -55,6 +55,7 @@ from backend.services.asr_module import (
     ASRError,
     ASRConnectionError,
     ASRTranscriptionError,
+    ASRBackpressureError,
     WhisperModelSize,
     TranscriptionResult,
     TranscriptionStream,
@@ -72,6 +73,9 @@ from backend.services.dialog_engine import (
     ConversationTurn,
     SessionState,
     SessionSummary,
+    DialogError,
+    SessionNotFoundError,
+    SessionInactiveError,
 )
 from backend.services.session_manager import (
     SessionManager,
@@ -127,6 +131,7 @@ __all__ = [
     "ASRError",
     "ASRConnectionError",
     "ASRTranscriptionError",
+    "ASRBackpressureError",
     "WhisperModelSize",
     "TranscriptionResult",
     "TranscriptionStream",
@@ -142,6 +147,9 @@ __all__ = [
     "ConversationTurn",
     "SessionState",
     "SessionSummary",
+    "DialogError",
+    "SessionNotFoundError",
+    "SessionInactiveError",
     "SessionManager",
     "SessionData",
     "ConceptCoverageResult",
@@ -11,13 +11,26 @@ import os
 # Fix OpenMP duplicate library issue on macOS
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
 
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Callable, Optional, List
+from functools import lru_cache
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, List, Tuple, Union
+import re
 import threading
-import queue
 import time
 
+import httpx
+import numpy as np
+
+try:
+    import soxr  # Optional: anti-aliased resampling for non-16kHz input
+except ImportError:
+    soxr = None
+
 
 class ASRError(Exception):
     """Base exception for ASR-related errors."""
@@ -34,6 +47,11 @@ class ASRTranscriptionError(ASRError):
     pass
 
 
+class ASRBackpressureError(ASRError):
+    """Raised when a stream's audio buffer is full and a chunk is dropped."""
+    pass
+
+
 class WhisperModelSize(str, Enum):
     """Available Whisper model sizes."""
     TINY = "tiny"
@@ -43,7 +61,7 @@ class WhisperModelSize(str, Enum):
     LARGE = "large"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WordTimestamp:
     """Represents a word with its timing information."""
     word: str
@@ -51,7 +69,7 @@ class WordTimestamp:
     end_time: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptionResult:
     """Result of a transcription operation."""
     text: str
@@ -69,8 +87,13 @@ class ASRConfig:
     task: str = "transcribe"
     fp16: bool = False  # Use FP32 for CPU compatibility
     device: str = "cpu"  # Default to CPU for MacBook compatibility
+    backend: str = "faster_whisper"  # "faster_whisper" (CTranslate2) or "openai"
+    compute_type: Optional[str] = None  # faster-whisper quantization; None: int8 on CPU, float16 on GPU
+    vad_filter: bool = True  # faster-whisper: skip silent audio with Silero VAD before decoding
+    vad_energy_threshold: Optional[float] = 0.01  # Streaming: 20ms frames below this RMS are silence; None disables
     silence_threshold: float = 0.5  # Seconds of silence to detect pause
     max_audio_length: float = 30.0  # Maximum audio length in seconds
+    result_cache_size: int = 256  # Transcriptions memoized by audio content hash; 0 disables
     # 繁體中文優化參數
     initial_prompt: str = "以下是繁體中文數學教學對話。"  # 引導模型輸出繁體中文
     temperature: float = 0.0  # 降低隨機性，提高準確度
@@ -88,49 +111,91 @@ class TranscriptionStream:
     Handles streaming transcription with callbacks for partial and final results.
     """
     
-    def __init__(self):
-        self._partial_callbacks: List[Callable[[str], None]] = []
-        self._final_callbacks: List[Callable[[TranscriptionResult], None]] = []
-        self._error_callbacks: List[Callable[[Exception], None]] = []
+    def __init__(
+        self,
+        transcriber: Optional[Callable[[np.ndarray], TranscriptionResult]] = None,
+        max_audio_length: float = 30.0,
+        sample_rate: int = 16000,
+        vad_threshold: Optional[float] = None,
+        silence_hangover: float = 0.5,
+    ):
+        """
+        Initialize the stream.
+        
+        Args:
+            transcriber: Callable turning float32 mono samples into a TranscriptionResult.
+                When set, a worker thread transcribes buffered audio while active.
+            max_audio_length: Ring buffer capacity in seconds.
+            sample_rate: Sample rate of incoming 16-bit PCM chunks.
+            vad_threshold: RMS level (0-1) a 20ms frame must reach to count as speech.
+                Chunks arriving after more than silence_hangover seconds of silence
+                are dropped instead of buffered. None keeps every chunk.
+            silence_hangover: Seconds of silence still buffered after speech, so word
+                endings and short pauses reach Whisper.
+        """
+        # Immutable snapshots, replaced on (un)registration, so emitting from the
+        # worker thread never iterates a list another thread is changing
+        self._partial_callbacks: Tuple[Callable[[str], None], ...] = ()
+        self._final_callbacks: Tuple[Callable[[TranscriptionResult], None], ...] = ()
+        self._error_callbacks: Tuple[Callable[[Exception], None], ...] = ()
         self._is_active = False
-        self._audio_queue: queue.Queue = queue.Queue()
+        self._transcriber = transcriber
+        # Preallocated ring buffer of float32 samples; _read is the oldest unread sample
+        self._ring = np.zeros(int(max_audio_length * sample_rate), dtype=np.float32)
+        self._read = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._data_available = threading.Condition(self._lock)
+        self._space_available = threading.Condition(self._lock)
         self._processing_thread: Optional[threading.Thread] = None
+        # Energy VAD state; a new stream starts in silence
+        self._vad_threshold = vad_threshold
+        self._vad_frame = max(sample_rate // 50, 1)  # 20ms
+        self._hangover_samples = int(silence_hangover * sample_rate)
+        self._silent_samples = self._hangover_samples + 1
     
     def on_partial_result(self, callback: Callable[[str], None]) -> None:
         """Register a callback for partial transcription results."""
-        self._partial_callbacks.append(callback)
+        self._partial_callbacks += (callback,)
     
     def on_final_result(self, callback: Callable[[TranscriptionResult], None]) -> None:
         """Register a callback for final transcription results."""
-        self._final_callbacks.append(callback)
+        self._final_callbacks += (callback,)
     
     def on_error(self, callback: Callable[[Exception], None]) -> None:
         """Register a callback for errors."""
-        self._error_callbacks.append(callback)
+        self._error_callbacks += (callback,)
     
-    def _emit_partial(self, text: str) -> None:
-        """Emit partial result to all registered callbacks."""
-        for callback in self._partial_callbacks:
+    def _dispatch(self, attr: str, value) -> None:
+        """
+        Call every callback stored under attr with value.
+        
+        A callback that raises is unregistered so later emits don't keep paying
+        for it, and its error never breaks the stream.
+        """
+        failed = ()
+        for callback in getattr(self, attr):
             try:
-                callback(text)
+                callback(value)
             except Exception:
-                pass  # Don't let callback errors break the stream
+                failed += (callback,)
+        if failed:
+            setattr(self, attr, tuple(cb for cb in getattr(self, attr) if cb not in failed))
+    
+    def _emit_partial(self, text: str) -> None:
+        """Emit partial result to all registered callbacks."""
+        if self._partial_callbacks:
+            self._dispatch("_partial_callbacks", text)
     
     def _emit_final(self, result: TranscriptionResult) -> None:
         """Emit final result to all registered callbacks."""
-        for callback in self._final_callbacks:
-            try:
-                callback(result)
-            except Exception:
-                pass
+        if self._final_callbacks:
+            self._dispatch("_final_callbacks", result)
     
     def _emit_error(self, error: Exception) -> None:
         """Emit error to all registered callbacks."""
-        for callback in self._error_callbacks:
-            try:
-                callback(error)
-            except Exception:
-                pass
+        if self._error_callbacks:
+            self._dispatch("_error_callbacks", error)
     
     @property
     def is_active(self) -> bool:
@@ -140,19 +205,127 @@ class TranscriptionStream:
     def start(self) -> None:
         """Start the transcription stream."""
         self._is_active = True
+        if self._transcriber and self._processing_thread is None:
+            self._processing_thread = threading.Thread(target=self._run, daemon=True)
+            self._processing_thread.start()
     
     def stop(self) -> None:
         """Stop the transcription stream."""
-        self._is_active = False
+        with self._lock:
+            self._is_active = False
+            self._data_available.notify_all()
+            self._space_available.notify_all()
+        if self._processing_thread is not None:
+            if self._processing_thread is not threading.current_thread():
+                self._processing_thread.join(timeout=1.0)
+            self._processing_thread = None
+    
+    def add_audio_chunk(self, audio_data: bytes, block: bool = True) -> None:
+        """
+        Add a 16-bit PCM audio chunk to the ring buffer.
+        
+        The buffer holds at most max_audio_length seconds. When it is full and
+        block is True, this waits until the worker frees space so producers
+        cannot outrun it. With block=False the chunk is dropped instead and an
+        ASRBackpressureError goes to the error callbacks, which keeps callers on
+        an event loop from stalling.
+        
+        Args:
+            audio_data: Raw 16-bit PCM audio bytes.
+            block: Wait for free space instead of dropping the chunk.
+        """
+        samples = np.frombuffer(audio_data, dtype=np.int16)
+        capacity = len(self._ring)
+        if len(samples) > capacity:
+            samples = samples[-capacity:]
+        n = len(samples)
+        if n == 0:
+            return
+        if self._vad_threshold is not None and not self._is_voiced(samples):
+            self._silent_samples += n
+            if self._silent_samples > self._hangover_samples:
+                return
+        else:
+            self._silent_samples = 0
+        
+        with self._lock:
+            while block and self._is_active and capacity - self._size < n:
+                self._space_available.wait(timeout=0.1)
+            if not self._is_active:
+                return
+            full = capacity - self._size < n
+            if not full:
+                self._write_ring(samples)
+                self._data_available.notify()
+        if full:
+            # Emitted outside the lock so error callbacks may call stop()
+            self._emit_error(ASRBackpressureError(
+                f"Audio buffer full, dropped {n} samples"
+            ))
+    
+    def _write_ring(self, samples: np.ndarray) -> None:
+        """Decode int16 samples straight into the ring; caller holds the lock."""
+        capacity = len(self._ring)
+        n = len(samples)
+        write = (self._read + self._size) % capacity
+        first = min(n, capacity - write)
+        # Wraps to the start of the ring at most once
+        np.multiply(samples[:first], 1.0 / 32768.0, out=self._ring[write:write + first],
+                    casting="unsafe")
+        if first < n:
+            np.multiply(samples[first:], 1.0 / 32768.0, out=self._ring[:n - first],
+                        casting="unsafe")
+        self._size += n
+    
+    def _is_voiced(self, samples: np.ndarray) -> bool:
+        """Check whether any 20ms frame of int16 samples is louder than the VAD threshold."""
+        frames = len(samples) // self._vad_frame
+        if frames:
+            blocks = samples[:frames * self._vad_frame].reshape(frames, self._vad_frame)
+        else:
+            blocks = samples.reshape(1, -1)
+        blocks = blocks.astype(np.float32)
+        mean_square = np.einsum("ij,ij->i", blocks, blocks) / blocks.shape[1]
+        limit = (self._vad_threshold * 32768.0) ** 2
+        return bool((mean_square > limit).any())
     
-    def add_audio_chunk(self, audio_data: bytes) -> None:
-        """Add an audio chunk to the processing queue."""
-        if self._is_active:
-            self._audio_queue.put(audio_data)
+    def _run(self) -> None:
+        """Worker loop: transcribe everything buffered so far as one array."""
+        capacity = len(self._ring)
+        while True:
+            with self._lock:
+                while self._is_active and self._size == 0:
+                    self._data_available.wait(timeout=0.1)
+                if not self._is_active:
+                    return
+                read, size = self._read, self._size
+            
+            # The unread region is never overwritten until _read advances,
+            # so a contiguous run can be handed over as a view
+            if read + size <= capacity:
+                samples = self._ring[read:read + size]
+            else:
+                samples = np.concatenate((self._ring[read:], self._ring[:read + size - capacity]))
+            
+            try:
+                result = self._transcriber(samples)
+            except Exception as e:
+                result = None
+                self._emit_error(e)
+            
+            with self._lock:
+                self._read = (read + size) % capacity
+                self._size -= size
+                self._space_available.notify_all()
+            
+            if result is not None and result.text:
+                self._emit_final(result)
 
 
 # Math symbol mapping: oral description -> mathematical symbol
-MATH_SYMBOL_MAPPINGS = {
+# The mapping tables are read-only: the conversion patterns below are compiled
+# from them once at import time.
+MATH_SYMBOL_MAPPINGS = MappingProxyType({
     # Powers and roots (Chinese)
     "x平方": "x²",
     "X平方": "x²",
@@ -278,11 +451,11 @@ MATH_SYMBOL_MAPPINGS = {
     "因此": "∴",
     "因為": "∵",
     "因为": "∵",
-}
+})
 
 # 簡體轉繁體常用字對照表（數學教學相關）
 # 包含單字和詞組，處理時會按長度排序（長詞優先）
-SIMPLIFIED_TO_TRADITIONAL = {
+SIMPLIFIED_TO_TRADITIONAL = MappingProxyType({
     # 重要單字（確保基本轉換）
     "于": "於",  # 用於 "大于" -> "大於" 等
     "与": "與",
@@ -655,69 +828,269 @@ SIMPLIFIED_TO_TRADITIONAL = {
     "能够": "能夠",
     "可以": "可以", "可能": "可能",
     "以后": "以後",
-}
+})
 
-# Reverse mapping for converting symbols back to oral descriptions
-SYMBOL_TO_ORAL_MAPPINGS = {
-    "x²": "x平方",
-    "y²": "y平方",
-    "a²": "a平方",
-    "b²": "b平方",
-    "n²": "n平方",
-    "x³": "x立方",
-    "y³": "y立方",
-    "√": "根號",
-    "√2": "根號2",
-    "√3": "根號3",
-    "√x": "根號x",
-    "½": "二分之一",
-    "⅓": "三分之一",
-    "¼": "四分之一",
-    "⅔": "三分之二",
-    "¾": "四分之三",
+# Oral forms that differ from the first (canonical) MATH_SYMBOL_MAPPINGS entry
+_SYMBOL_TO_ORAL_OVERRIDES = {
     "π": "圓周率",
-    "α": "阿爾法",
-    "β": "貝塔",
-    "γ": "伽馬",
-    "δ": "德爾塔",
-    "θ": "西塔",
-    ">": "大於",
-    "<": "小於",
-    "≥": "大於等於",
-    "≤": "小於等於",
-    "≠": "不等於",
-    "=": "等於",
-    "≈": "約等於",
     "+": "加",
     "-": "減",
     "×": "乘",
     "÷": "除",
-    "±": "正負",
-    "∈": "屬於",
-    "∉": "不屬於",
-    "⊂": "子集",
-    "∪": "聯集",
-    "∩": "交集",
-    "∅": "空集",
-    "∞": "無限",
-    "∫": "積分",
-    "∂": "偏微分",
-    "Σ": "求和",
-    "∏": "連乘",
-    "∠": "角",
-    "°": "度",
-    "⊥": "垂直",
-    "∥": "平行",
-    "△": "三角形",
-    "○": "圓",
-    "∧": "且",
-    "∨": "或",
     "¬": "非",
-    "⟺": "若且唯若",
-    "⟹": "若則",
-    "∴": "因此",
-    "∵": "因為",
 }
+# Symbols that are ordinary text characters and must never be read out
+_SYMBOL_TO_ORAL_EXCLUDED = frozenset({"/", "d"})
+
+
+def _invert_math_symbol_mappings() -> Dict[str, str]:
+    """Map each symbol to its first oral form in MATH_SYMBOL_MAPPINGS, then apply overrides."""
+    inverse: Dict[str, str] = {}
+    for oral, symbol in MATH_SYMBOL_MAPPINGS.items():
+        if symbol not in _SYMBOL_TO_ORAL_EXCLUDED:
+            inverse.setdefault(symbol, oral)
+    inverse.update(_SYMBOL_TO_ORAL_OVERRIDES)
+    return inverse
+
+
+# Reverse mapping for converting symbols back to oral descriptions
+SYMBOL_TO_ORAL_MAPPINGS = MappingProxyType(_invert_math_symbol_mappings())
+
+
+def _compile_mapping_pattern(mappings: Mapping[str, str]) -> "re.Pattern[str]":
+    """
+    Compile mapping keys into one prefix-trie regex.
+    
+    Keys sharing a prefix share a branch (e.g. 根號, 根號2, 根號3 -> 根號[23]?),
+    so a single scan walks the trie like an automaton instead of retrying every
+    key at each position. Greedy optional tails make the longest key win.
+    """
+    if not mappings:
+        return re.compile(r"(?!)")  # Never matches
+    trie: dict = {}
+    for key in mappings:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = True  # Marks the end of a key
+    return re.compile(_trie_to_regex(trie))
+
+
+def _trie_to_regex(node: dict) -> str:
+    """Render a trie node as a regex; keys ending here make the remainder optional."""
+    branches = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if "" in node else pattern
+
+
+_MATH_SYMBOL_PATTERN = _compile_mapping_pattern(MATH_SYMBOL_MAPPINGS)
+_SYMBOL_TO_ORAL_PATTERN = _compile_mapping_pattern(SYMBOL_TO_ORAL_MAPPINGS)
+
+# Simplified -> traditional: single characters are a 1:1 codepoint rewrite done with
+# str.translate; only phrases that per-character translation gets wrong (e.g. 学习,
+# where 习 has no single-character entry) still need a pattern, keyed on their
+# already-translated form.
+_SIMPLIFIED_TO_TRADITIONAL_TABLE = str.maketrans({
+    simplified: traditional
+    for simplified, traditional in SIMPLIFIED_TO_TRADITIONAL.items()
+    if len(simplified) == 1 and simplified != traditional
+})
+_SIMPLIFIED_TO_TRADITIONAL_PHRASES = {
+    simplified.translate(_SIMPLIFIED_TO_TRADITIONAL_TABLE): traditional
+    for simplified, traditional in SIMPLIFIED_TO_TRADITIONAL.items()
+    if len(simplified) > 1
+    and simplified.translate(_SIMPLIFIED_TO_TRADITIONAL_TABLE) != traditional
+}
+_SIMPLIFIED_TO_TRADITIONAL_PATTERN = _compile_mapping_pattern(_SIMPLIFIED_TO_TRADITIONAL_PHRASES)
+_SIMPLIFIED_TO_TRADITIONAL_TRIGGERS = frozenset(key[0] for key in _SIMPLIFIED_TO_TRADITIONAL_PHRASES)
+# Whisper is prompted for traditional output, so most text has none of these
+_SIMPLIFIED_CHARS = frozenset(map(chr, _SIMPLIFIED_TO_TRADITIONAL_TABLE))
+
+
+# Chinese digit characters -> Arabic numerals; a bare 十 expands to "10"
+_CN_DIGIT_TABLE = str.maketrans({
+    "零": "0", "〇": "0",
+    "一": "1", "二": "2", "三": "3", "四": "4",
+    "五": "5", "六": "6", "七": "7", "八": "8", "九": "9",
+    "十": "10",
+})
+
+# 十 followed by a digit (11-19) only contributes its leading "1"
+_CN_TEEN_PATTERN = re.compile(r"十(?=[一二三四五六七八九])")
+_CN_DIGIT_CHARS = frozenset(map(chr, _CN_DIGIT_TABLE))
+
+# Loaded Whisper models keyed by (backend, model size, device, compute type)
+_MODEL_CACHE: Dict[Tuple[str, str, str, Optional[str]], object] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _cached_model(key: Tuple[str, str, str, Optional[str]], loader: Callable[[], object]) -> object:
+    """Return the cached model for key, loading it once under the lock."""
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            model = loader()
+            _MODEL_CACHE[key] = model
+        return model
+
+
+# Shared keep-alive client for Ollama correction calls (created on first use)
+_OLLAMA_HTTP_CLIENT: Optional[httpx.Client] = None
+_OLLAMA_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _ollama_http_client() -> httpx.Client:
+    """Get or create the pooled HTTP client so each correction reuses a warm connection."""
+    global _OLLAMA_HTTP_CLIENT
+    if _OLLAMA_HTTP_CLIENT is None:
+        with _OLLAMA_HTTP_CLIENT_LOCK:
+            if _OLLAMA_HTTP_CLIENT is None:
+                _OLLAMA_HTTP_CLIENT = httpx.Client(
+                    timeout=httpx.Timeout(30.0),
+                    limits=httpx.Limits(max_keepalive_connections=4)
+                )
+    return _OLLAMA_HTTP_CLIENT
+
+
+# Labels the correction model sometimes puts before its answer
+_LLM_ANSWER_PREFIXES = ("輸出：", "輸出:", "修正後：", "修正後:", "答：", "答:")
+
+
+def _strip_answer_prefixes(answer: str) -> str:
+    """Remove leading answer labels such as "輸出：" from an LLM reply."""
+    for prefix in _LLM_ANSWER_PREFIXES:
+        if answer.startswith(prefix):
+            answer = answer[len(prefix):].strip()
+    return answer
+
+
+def _read_answer_line(response: httpx.Response) -> str:
+    """
+    Collect a streamed Ollama reply up to the end of its first non-empty answer line.
+    
+    Returning early closes the response, which makes Ollama stop generating, so
+    latency no longer depends on num_predict when the answer is one short line.
+    """
+    pieces = []
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        pieces.append(chunk.get("response", ""))
+        if chunk.get("done"):
+            break
+        if "\n" in pieces[-1]:
+            for answer in "".join(pieces).split("\n")[:-1]:
+                if _strip_answer_prefixes(answer.strip().strip('"\'「」『』').strip()):
+                    return answer
+    return "".join(pieces)
+
+
+def _faster_whisper_result(segments, info) -> dict:
+    """Convert faster-whisper's segment generator into openai-whisper's result dict."""
+    texts = []
+    converted = []
+    for segment in segments:
+        texts.append(segment.text)
+        converted.append({
+            "end": segment.end,
+            "no_speech_prob": segment.no_speech_prob,
+            "words": [
+                {"word": word.word, "start": word.start, "end": word.end}
+                for word in segment.words or ()
+            ],
+        })
+    return {
+        "text": "".join(texts),
+        "segments": converted,
+        "language": info.language,
+        "duration": info.duration,
+    }
+
+
+def _audio_digest(audio) -> Optional[bytes]:
+    """
+    Hash audio content for the result cache.
+    
+    Files are hashed by their bytes, so re-uploads under new temp names still hit.
+    Returns None for inputs that are not cached (device tensors, unreadable paths).
+    """
+    if isinstance(audio, str):
+        try:
+            with open(audio, "rb") as f:
+                return hashlib.blake2b(f.read(), digest_size=16).digest()
+        except OSError:
+            return None  # Let Whisper report unreadable paths
+    if isinstance(audio, np.ndarray):
+        data = np.ascontiguousarray(audio)
+        return hashlib.blake2b(data.data, digest_size=16).digest() + str(data.dtype).encode()
+    return None
+
+
+def _resample_to_16k(audio_array: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Resample mono float32 audio to 16kHz.
+    
+    Uses soxr's anti-aliased SIMD resampler when installed, otherwise linear
+    interpolation on the 16kHz time grid.
+    """
+    if soxr is not None:
+        return soxr.resample(audio_array, sample_rate, 16000, quality="QQ").astype(
+            np.float32, copy=False
+        )
+    
+    new_length = int(len(audio_array) * 16000 / sample_rate)
+    new_positions = np.linspace(0, len(audio_array) - 1, new_length)
+    return np.interp(
+        new_positions, np.arange(len(audio_array)), audio_array
+    ).astype(np.float32, copy=False)
+
+
+# First characters of every oral math key; text without any of them needs no conversion
+_MATH_SYMBOL_TRIGGERS = frozenset(key[0] for key in MATH_SYMBOL_MAPPINGS)
+_SYMBOL_TO_ORAL_TRIGGERS = frozenset(key[0] for key in SYMBOL_TO_ORAL_MAPPINGS)
+
+# Streaming partials repeat often; only short chunks are cached to bound memory
+_POST_PROCESS_CACHE_MAX_LENGTH = 256
+
+
+def _convert_math_symbols(text: str) -> str:
+    """Single pass, longest match first to avoid partial replacements."""
+    return _MATH_SYMBOL_PATTERN.sub(lambda m: MATH_SYMBOL_MAPPINGS[m[0]], text)
+
+
+_convert_math_symbols_cached = lru_cache(maxsize=1024)(_convert_math_symbols)
+
+
+def _convert_simplified_to_traditional(text: str) -> str:
+    """Per-character translate, then fix up the few phrases it gets wrong."""
+    # Set scan is far cheaper than a translate pass over already-traditional text
+    if not _SIMPLIFIED_CHARS.isdisjoint(text):
+        text = text.translate(_SIMPLIFIED_TO_TRADITIONAL_TABLE)
+    if _SIMPLIFIED_TO_TRADITIONAL_TRIGGERS.isdisjoint(text):
+        return text
+    return _SIMPLIFIED_TO_TRADITIONAL_PATTERN.sub(
+        lambda m: _SIMPLIFIED_TO_TRADITIONAL_PHRASES[m[0]], text
+    )
+
+
+def _full_post_process(text: str) -> str:
+    """Math symbols first (keys cover simplified and traditional), then simplified -> traditional."""
+    if not _MATH_SYMBOL_TRIGGERS.isdisjoint(text):
+        text = _convert_math_symbols(text)
+    return _convert_simplified_to_traditional(text)
+
+
+# One cache for the whole pipeline, so a repeated partial costs a single lookup
+_full_post_process_cached = lru_cache(maxsize=1024)(_full_post_process)
 
 
 class ASRModule:
@@ -745,20 +1118,68 @@ class ASRModule:
         self._current_stream: Optional[TranscriptionStream] = None
         self._last_confidence: float = 0.0
         self._is_loaded = False
+        self._backend: Optional[str] = None
+        # Per-thread float32 scratch for PCM decoding; the module is shared by requests
+        self._f32_local = threading.local()
+        # LRU of results keyed by (audio digest, decode options); repeated clips skip Whisper
+        self._result_cache: "OrderedDict[tuple, TranscriptionResult]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+    
+    def _f32_buffer(self, size: int) -> np.ndarray:
+        """Return a reusable float32 buffer of at least ``size`` samples for this thread."""
+        buf = getattr(self._f32_local, "buf", None)
+        if buf is None or buf.size < size:
+            buf = self._f32_local.buf = np.empty(size, dtype=np.float32)
+        return buf[:size]
     
     def load_model(self) -> None:
         """
         Load the Whisper model.
         
+        Uses faster-whisper (CTranslate2, int8 on CPU by default) when configured
+        and installed, otherwise falls back to openai-whisper. Loaded models are
+        shared by every ASRModule with the same backend, size, device and compute
+        type, so only the first instance pays for reading the weights.
+        
         Raises:
             ASRConnectionError: If model cannot be loaded.
         """
+        if self.config.backend == "faster_whisper":
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError:
+                WhisperModel = None
+            if WhisperModel is not None:
+                compute_type = self.config.compute_type or (
+                    "int8" if self.config.device == "cpu" else "float16"
+                )
+                try:
+                    self._model = _cached_model(
+                        ("faster_whisper", self.config.model_size.value,
+                         self.config.device, compute_type),
+                        lambda: WhisperModel(
+                            self.config.model_size.value,
+                            device=self.config.device,
+                            compute_type=compute_type,
+                            cpu_threads=os.cpu_count() or 0
+                        )
+                    )
+                except Exception as e:
+                    raise ASRConnectionError(f"Failed to load Whisper model: {str(e)}")
+                self._backend = "faster_whisper"
+                self._is_loaded = True
+                return
+        
         try:
             import whisper
-            self._model = whisper.load_model(
-                self.config.model_size.value,
-                device=self.config.device
+            self._model = _cached_model(
+                ("openai", self.config.model_size.value, self.config.device, None),
+                lambda: whisper.load_model(
+                    self.config.model_size.value,
+                    device=self.config.device
+                )
             )
+            self._backend = "openai"
             self._is_loaded = True
         except ImportError:
             raise ASRConnectionError(
@@ -774,14 +1195,14 @@ class ASRModule:
     
     def transcribe(
         self,
-        audio_path: str,
+        audio: Union[str, np.ndarray],
         language: Optional[str] = None
     ) -> TranscriptionResult:
         """
-        Transcribe an audio file.
+        Transcribe an audio file or in-memory samples.
         
         Args:
-            audio_path: Path to the audio file.
+            audio: Path to the audio file, or float32 mono samples at 16kHz.
             language: Language code (e.g., 'zh' for Chinese). Uses config default if not provided.
         
         Returns:
@@ -791,68 +1212,115 @@ class ASRModule:
             ASRConnectionError: If model is not loaded.
             ASRTranscriptionError: If transcription fails.
         """
+        if isinstance(audio, np.ndarray):
+            return self._transcribe_samples(audio, language)
+        
         if not self._is_loaded:
             self.load_model()
         
         try:
-            # 使用優化參數進行轉錄（優化速度）
-            result = self._model.transcribe(
-                audio_path,
-                language=language or self.config.language,
-                task=self.config.task,
-                fp16=self.config.fp16,
-                # 繁體中文優化參數
-                initial_prompt=self.config.initial_prompt,
-                temperature=self.config.temperature,
-                beam_size=self.config.beam_size,
-                best_of=self.config.best_of,
-                condition_on_previous_text=self.config.condition_on_previous_text,
-                # 禁用 word timestamps 以加速處理
-                word_timestamps=False,
-            )
-            
-            # Extract word timestamps if available
-            timestamps = []
-            if "segments" in result:
-                for segment in result["segments"]:
-                    if "words" in segment:
-                        for word_info in segment["words"]:
-                            timestamps.append(WordTimestamp(
-                                word=word_info.get("word", ""),
-                                start_time=word_info.get("start", 0.0),
-                                end_time=word_info.get("end", 0.0)
-                            ))
-            
-            # Calculate confidence from segments
-            confidence = 1.0
-            if "segments" in result and result["segments"]:
-                avg_no_speech_prob = sum(
-                    seg.get("no_speech_prob", 0) for seg in result["segments"]
-                ) / len(result["segments"])
-                confidence = 1.0 - avg_no_speech_prob
-            
-            self._last_confidence = confidence
-            
-            # Calculate duration
-            duration = 0.0
-            if "segments" in result and result["segments"]:
-                duration = result["segments"][-1].get("end", 0.0)
-            
-            transcription_result = TranscriptionResult(
-                text=result.get("text", "").strip(),
-                confidence=confidence,
-                timestamps=timestamps,
-                duration=duration,
-                language=result.get("language", self.config.language)
-            )
-            
-            return transcription_result
-            
+            return self._run_whisper(audio, language)
+        
         except FileNotFoundError:
-            raise ASRTranscriptionError(f"Audio file not found: {audio_path}")
+            raise ASRTranscriptionError(f"Audio file not found: {audio}")
         except Exception as e:
             raise ASRTranscriptionError(f"Transcription failed: {str(e)}")
     
+    def _run_whisper(self, audio, language: Optional[str]) -> TranscriptionResult:
+        """
+        Run Whisper on a file path or a float32 16kHz mono array.
+        
+        Args:
+            audio: Audio file path, numpy array or (openai-whisper) torch tensor.
+            language: Language code. Uses config default if not provided.
+        
+        Returns:
+            TranscriptionResult with transcribed text and metadata.
+        """
+        # 使用優化參數進行轉錄（優化速度）
+        options = dict(
+            language=language or self.config.language,
+            task=self.config.task,
+            # 繁體中文優化參數
+            initial_prompt=self.config.initial_prompt,
+            temperature=self.config.temperature,
+            beam_size=self.config.beam_size,
+            best_of=self.config.best_of,
+            condition_on_previous_text=self.config.condition_on_previous_text,
+            # 禁用 word timestamps 以加速處理
+            word_timestamps=False,
+        )
+        cache_key = None
+        if self.config.result_cache_size > 0:
+            digest = _audio_digest(audio)
+            if digest is not None:
+                cache_key = (digest, self._backend, self.config.model_size.value,
+                             self.config.fp16, self.config.vad_filter, *options.values())
+                cached = self._cached_result(cache_key)
+                if cached is not None:
+                    return cached
+        
+        if self._backend == "faster_whisper":
+            segments, info = self._model.transcribe(
+                audio, vad_filter=self.config.vad_filter, **options
+            )
+            result = _faster_whisper_result(segments, info)
+        else:
+            result = self._model.transcribe(audio, fp16=self.config.fp16, **options)
+        
+        # Single pass over segments: word timestamps, no-speech average, last end time
+        segments = result.get("segments") or ()
+        timestamps = []
+        no_speech_sum = 0.0
+        duration = 0.0
+        for segment in segments:
+            no_speech_sum += segment.get("no_speech_prob", 0)
+            duration = segment.get("end", 0.0)
+            for word_info in segment.get("words", ()):
+                timestamps.append(WordTimestamp(
+                    word=word_info.get("word", ""),
+                    start_time=word_info.get("start", 0.0),
+                    end_time=word_info.get("end", 0.0)
+                ))
+        
+        # faster-whisper reports the full audio length, including trimmed silence
+        duration = result.get("duration", duration)
+        
+        # Confidence is one minus the mean no-speech probability
+        confidence = 1.0 - no_speech_sum / len(segments) if segments else 1.0
+        self._last_confidence = confidence
+        
+        transcription_result = TranscriptionResult(
+            text=result.get("text", "").strip(),
+            confidence=confidence,
+            timestamps=timestamps,
+            duration=duration,
+            language=result.get("language", self.config.language)
+        )
+        
+        if cache_key is not None:
+            self._store_result(cache_key, transcription_result)
+        
+        return transcription_result
+    
+    def _cached_result(self, key: tuple) -> Optional[TranscriptionResult]:
+        """Return a copy of a memoized result, marking it most recently used."""
+        with self._result_cache_lock:
+            result = self._result_cache.get(key)
+            if result is None:
+                return None
+            self._result_cache.move_to_end(key)
+        self._last_confidence = result.confidence
+        # Copies keep callers from mutating the cached entry
+        return replace(result, timestamps=list(result.timestamps))
+    
+    def _store_result(self, key: tuple, result: TranscriptionResult) -> None:
+        """Memoize a result, evicting the least recently used beyond the cache size."""
+        with self._result_cache_lock:
+            self._result_cache[key] = replace(result, timestamps=list(result.timestamps))
+            while len(self._result_cache) > self.config.result_cache_size:
+                self._result_cache.popitem(last=False)
+    
     def transcribe_audio_data(
         self,
         audio_data: bytes,
@@ -870,73 +1338,127 @@ class ASRModule:
         Returns:
             TranscriptionResult with transcribed text and metadata.
         """
-        import tempfile
-        import os
-        import numpy as np
-        
-        if not self._is_loaded:
-            self.load_model()
+        if self.config.device != "cpu" and sample_rate == 16000 and audio_data:
+            if not self._is_loaded:
+                self.load_model()
+            # openai-whisper takes torch tensors: upload int16 and scale on the device
+            if self._backend == "openai":
+                try:
+                    return self._run_whisper(self._pcm_to_device(audio_data), language)
+                except Exception as e:
+                    raise ASRTranscriptionError(f"Failed to transcribe audio data: {str(e)}")
         
         try:
             # Convert bytes to numpy array
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+            # int16 -> float32 scaling in one ufunc pass into a reused buffer
+            pcm = np.frombuffer(audio_data, dtype=np.int16)
+            audio_array = self._f32_buffer(pcm.size)
+            np.multiply(pcm, np.float32(1.0 / 32768.0), out=audio_array, casting="unsafe")
             
             # Resample to 16kHz if needed (Whisper expects 16kHz)
-            if sample_rate != 16000:
-                # Simple resampling - for production, use librosa or scipy
-                ratio = 16000 / sample_rate
-                new_length = int(len(audio_array) * ratio)
-                indices = np.linspace(0, len(audio_array) - 1, new_length).astype(int)
-                audio_array = audio_array[indices]
-            
-            # Save to temporary file for Whisper
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                # Write WAV header and data
-                self._write_wav(tmp_file, audio_array, 16000)
+            if sample_rate != 16000 and len(audio_array) > 0:
+                audio_array = _resample_to_16k(audio_array, sample_rate)
             
-            try:
-                result = self.transcribe(tmp_path, language)
-                return result
-            finally:
-                os.unlink(tmp_path)
-                
         except Exception as e:
             raise ASRTranscriptionError(f"Failed to transcribe audio data: {str(e)}")
+        
+        return self._transcribe_samples(audio_array, language)
     
-    def _write_wav(self, file, audio_array, sample_rate: int) -> None:
-        """Write audio array to WAV file."""
-        import struct
-        
-        # Convert float32 to int16
-        audio_int16 = (audio_array * 32767).astype('int16')
-        
-        # WAV header
-        num_channels = 1
-        bits_per_sample = 16
-        byte_rate = sample_rate * num_channels * bits_per_sample // 8
-        block_align = num_channels * bits_per_sample // 8
-        data_size = len(audio_int16) * 2
-        
-        # Write RIFF header
-        file.write(b'RIFF')
-        file.write(struct.pack('<I', 36 + data_size))
-        file.write(b'WAVE')
-        
-        # Write fmt chunk
-        file.write(b'fmt ')
-        file.write(struct.pack('<I', 16))  # Chunk size
-        file.write(struct.pack('<H', 1))   # Audio format (PCM)
-        file.write(struct.pack('<H', num_channels))
-        file.write(struct.pack('<I', sample_rate))
-        file.write(struct.pack('<I', byte_rate))
-        file.write(struct.pack('<H', block_align))
-        file.write(struct.pack('<H', bits_per_sample))
-        
-        # Write data chunk
-        file.write(b'data')
-        file.write(struct.pack('<I', data_size))
-        file.write(audio_int16.tobytes())
+    def _pcm_to_device(self, audio_data: bytes):
+        """
+        Move 16-bit PCM to the configured device and convert it to float32 there.
+        
+        Only the int16 samples cross the bus, half the bytes of a float32 upload.
+        """
+        import torch  # Always present alongside openai-whisper
+        
+        # frombuffer needs a writable buffer; copying int16 is cheaper than float32
+        pcm = torch.frombuffer(bytearray(audio_data), dtype=torch.int16)
+        return pcm.to(self.config.device, non_blocking=True).to(torch.float32).mul_(1.0 / 32768.0)
+    
+    def _transcribe_samples(
+        self,
+        samples: np.ndarray,
+        language: Optional[str] = None
+    ) -> TranscriptionResult:
+        """
+        Transcribe float32 mono samples at 16kHz.
+        
+        Whisper accepts the array directly, so no temporary WAV file is needed.
+        """
+        if not self._is_loaded:
+            self.load_model()
+        
+        try:
+            # Whisper wants a C-contiguous float32 buffer; no-op for our own arrays
+            samples = np.ascontiguousarray(samples, dtype=np.float32)
+            return self._run_whisper(samples, language)
+        except Exception as e:
+            raise ASRTranscriptionError(f"Failed to transcribe audio data: {str(e)}")
+    
+    def transcribe_many(
+        self,
+        audio_arrays: List[np.ndarray],
+        language: Optional[str] = None
+    ) -> List[TranscriptionResult]:
+        """
+        Transcribe several independent clips (float32 mono, 16kHz) at once.
+        
+        With openai-whisper every clip is padded to the 30s encoder window and the
+        whole batch goes through one encoder/decoder call, so N queued clips cost
+        about as much as one. Clips longer than 30s are truncated. faster-whisper
+        has no batched API for separate clips, so they are transcribed in turn.
+        
+        Args:
+            audio_arrays: Clips to transcribe.
+            language: Language code. Uses config default if not provided.
+        
+        Returns:
+            One TranscriptionResult per clip, in input order.
+        """
+        if not audio_arrays:
+            return []
+        if not self._is_loaded:
+            self.load_model()
+        if self._backend == "faster_whisper":
+            return [self._transcribe_samples(audio, language) for audio in audio_arrays]
+        
+        try:
+            import whisper
+            
+            batch = np.stack([
+                whisper.pad_or_trim(np.asarray(audio, dtype=np.float32)) for audio in audio_arrays
+            ])
+            mel = whisper.log_mel_spectrogram(batch, n_mels=self._model.dims.n_mels)
+            # beam_size and best_of are mutually exclusive in DecodingOptions
+            if self.config.temperature > 0:
+                sampling = {"best_of": self.config.best_of}
+            else:
+                sampling = {"beam_size": self.config.beam_size}
+            options = whisper.DecodingOptions(
+                language=language or self.config.language,
+                task=self.config.task,
+                fp16=self.config.fp16,
+                prompt=self.config.initial_prompt,
+                temperature=self.config.temperature,
+                without_timestamps=True,
+                **sampling
+            )
+            decoded = whisper.decode(self._model, mel.to(self._model.device), options)
+        except Exception as e:
+            raise ASRTranscriptionError(f"Batch transcription failed: {str(e)}")
+        
+        results = [
+            TranscriptionResult(
+                text=item.text.strip(),
+                confidence=1.0 - item.no_speech_prob,
+                duration=min(len(audio) / 16000, 30.0),
+                language=item.language or self.config.language
+            )
+            for audio, item in zip(audio_arrays, decoded)
+        ]
+        self._last_confidence = results[-1].confidence
+        return results
     
     def start_streaming(self) -> TranscriptionStream:
         """
@@ -950,7 +1472,12 @@ class ASRModule:
         if self._current_stream and self._current_stream.is_active:
             self.stop_streaming()
         
-        self._current_stream = TranscriptionStream()
+        self._current_stream = TranscriptionStream(
+            transcriber=self._transcribe_samples,
+            max_audio_length=self.config.max_audio_length,
+            vad_threshold=self.config.vad_energy_threshold,
+            silence_hangover=self.config.silence_threshold,
+        )
         self._current_stream.start()
         return self._current_stream
     
@@ -987,19 +1514,11 @@ class ASRModule:
             "根號2" -> "√2"
             "大於等於" -> "≥"
         """
-        result = text
-        
-        # Sort mappings by length (longest first) to avoid partial replacements
-        sorted_mappings = sorted(
-            MATH_SYMBOL_MAPPINGS.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        )
-        
-        for oral, symbol in sorted_mappings:
-            result = result.replace(oral, symbol)
-        
-        return result
+        if _MATH_SYMBOL_TRIGGERS.isdisjoint(text):
+            return text
+        if len(text) > _POST_PROCESS_CACHE_MAX_LENGTH:
+            return _convert_math_symbols(text)
+        return _convert_math_symbols_cached(text)
     
     @staticmethod
     def convert_symbols_to_oral(text: str) -> str:
@@ -1014,19 +1533,10 @@ class ASRModule:
         
         This is the inverse of post_process_math_symbols for round-trip testing.
         """
-        result = text
-        
-        # Sort by symbol length (longest first)
-        sorted_mappings = sorted(
-            SYMBOL_TO_ORAL_MAPPINGS.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        )
-        
-        for symbol, oral in sorted_mappings:
-            result = result.replace(symbol, oral)
-        
-        return result
+        if _SYMBOL_TO_ORAL_TRIGGERS.isdisjoint(text):
+            return text
+        # Single pass, longest symbol first
+        return _SYMBOL_TO_ORAL_PATTERN.sub(lambda m: SYMBOL_TO_ORAL_MAPPINGS[m[0]], text)
     
     @staticmethod
     def convert_simplified_to_traditional(text: str) -> str:
@@ -1046,20 +1556,7 @@ class ASRModule:
             "这个数学问题" -> "這個數學問題"
             "计算结果" -> "計算結果"
         """
-        result = text
-        
-        # Sort mappings by length (longest first) to handle multi-character words first
-        # This prevents partial replacements (e.g., "数学" should be replaced before "数")
-        sorted_mappings = sorted(
-            SIMPLIFIED_TO_TRADITIONAL.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        )
-        
-        for simplified, traditional in sorted_mappings:
-            result = result.replace(simplified, traditional)
-        
-        return result
+        return _convert_simplified_to_traditional(text)
     
     @staticmethod
     def full_post_process(text: str) -> str:
@@ -1076,12 +1573,10 @@ class ASRModule:
         Returns:
             Fully processed text ready for display.
         """
-        # First convert oral math descriptions to symbols
-        # (math mappings include both simplified and traditional versions)
-        result = ASRModule.post_process_math_symbols(text)
-        # Then convert remaining simplified to traditional Chinese
-        result = ASRModule.convert_simplified_to_traditional(result)
-        return result
+        # Both steps run in one call; short (streaming partial) text is memoized
+        if len(text) > _POST_PROCESS_CACHE_MAX_LENGTH:
+            return _full_post_process(text)
+        return _full_post_process_cached(text)
     
     @staticmethod
     def llm_correct_transcription(
@@ -1102,7 +1597,6 @@ class ASRModule:
         Returns:
             Corrected text with improved accuracy.
         """
-        import requests
         import logging
         
         logger = logging.getLogger(__name__)
@@ -1131,12 +1625,14 @@ class ASRModule:
 輸出："""
 
         try:
-            response = requests.post(
+            # Stream tokens so generation can stop once the one-line answer is complete
+            with _ollama_http_client().stream(
+                "POST",
                 f"{base_url}/api/generate",
                 json={
                     "model": model,
                     "prompt": prompt,
-                    "stream": False,
+                    "stream": True,
                     "options": {
                         "temperature": 0.0,  # Zero temperature for deterministic output
                         "num_predict": len(text) * 3 + 50,  # Allow some room but not too much
@@ -1145,11 +1641,12 @@ class ASRModule:
                     }
                 },
                 timeout=30  # 30 second timeout
-            )
+            ) as response:
+                status_code = response.status_code
+                generated = _read_answer_line(response) if status_code == 200 else ""
             
-            if response.status_code == 200:
-                result = response.json()
-                corrected = result.get("response", "").strip()
+            if status_code == 200:
+                corrected = generated.strip()
                 
                 if not corrected:
                     logger.warning("LLM returned empty response, using original")
@@ -1161,10 +1658,7 @@ class ASRModule:
                 corrected = corrected.strip()
                 
                 # Remove any prefix like "輸出：" or "修正後："
-                prefixes_to_remove = ["輸出：", "輸出:", "修正後：", "修正後:", "答：", "答:"]
-                for prefix in prefixes_to_remove:
-                    if corrected.startswith(prefix):
-                        corrected = corrected[len(prefix):].strip()
+                corrected = _strip_answer_prefixes(corrected)
                 
                 # Remove trailing punctuation that LLM might add
                 corrected = corrected.rstrip('。，！？.!?,；;')
@@ -1191,13 +1685,13 @@ class ASRModule:
                 logger.info(f"LLM correction: '{text}' -> '{corrected}'")
                 return corrected
             else:
-                logger.warning(f"LLM API error {response.status_code}, using original text")
+                logger.warning(f"LLM API error {status_code}, using original text")
                 return text
                 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.warning("LLM correction timeout, using original text")
             return text
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             logger.warning("LLM service unavailable, using original text")
             return text
         except Exception as e:
@@ -1215,26 +1709,12 @@ class ASRModule:
         Returns:
             Text with Chinese numbers converted to Arabic.
         """
-        import re
-        
-        # Single digit mapping
-        digit_map = {
-            "零": "0", "〇": "0",
-            "一": "1", "二": "2", "三": "3", "四": "4",
-            "五": "5", "六": "6", "七": "7", "八": "8", "九": "9",
-        }
-        
-        result = text
-        
-        # Handle "十X" pattern (10-19)
-        result = re.sub(r'十([一二三四五六七八九])', lambda m: f"1{digit_map[m.group(1)]}", result)
-        result = result.replace("十", "10")
-        
-        # Handle single digits
-        for chinese, arabic in digit_map.items():
-            result = result.replace(chinese, arabic)
-        
-        return result
+        # Most text has no Chinese digits; a set scan skips both passes
+        if _CN_DIGIT_CHARS.isdisjoint(text):
+            return text
+        if "十" in text:
+            text = _CN_TEEN_PATTERN.sub("1", text)
+        return text.translate(_CN_DIGIT_TABLE)
     
     @staticmethod
     def full_post_process_with_llm(
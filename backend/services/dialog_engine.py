@@ -3,8 +3,12 @@ Dialog Engine for the AI Math Tutor system.
 Integrates FSM Controller, RAG Module, LLM Client, and Hint Controller
 to provide a complete tutoring dialog experience.
 """
+import functools
 import json
+import re
+import threading
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, Dict, Any
@@ -24,6 +28,62 @@ from backend.services.hint_controller import HintController, HintLevel
 from backend.services.prompt_builder import PromptBuilder, PromptContext
 
 
+# Phrases (matched case-insensitively) that mean the student is asking for a hint
+HINT_KEYWORDS = (
+    "給我提示", "提示", "幫幫我", "不知道", "不會",
+    "hint", "help", "卡住", "想不出來",
+)
+# One alternation scans the utterance once instead of once per keyword
+_HINT_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, HINT_KEYWORDS)))
+
+# Models often wrap JSON answers in a ```json ... ``` fence
+_JSON_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL | re.IGNORECASE)
+
+
+def _loads_llm_json(text: str) -> Any:
+    """Parse a JSON answer from the LLM, ignoring a surrounding code fence."""
+    match = _JSON_FENCE_PATTERN.match(text)
+    return json.loads(match.group(1) if match else text)
+
+
+def _default_analysis() -> Dict[str, Any]:
+    """Analysis used when the LLM is unavailable: keep the student talking."""
+    return {
+        "logic_complete": False,
+        "logic_gap": False,
+        "logic_error": False,
+        "error_type": None,
+        "missing_concepts": [],
+        "covered_concepts": [],
+        "feedback": "請繼續說明你的解題思路。",
+        "continue_listening": True
+    }
+
+
+def _holding_fsm_lock(method):
+    """Run a DialogEngine method while holding the engine's FSM lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._fsm_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class DialogError(Exception):
+    """Base exception for dialog engine errors."""
+    pass
+
+
+class SessionNotFoundError(DialogError):
+    """Raised when a session ID does not refer to a known session."""
+    pass
+
+
+class SessionInactiveError(DialogError):
+    """Raised when input is sent to a session that has already ended."""
+    pass
+
+
 class ResponseType(str, Enum):
     """Types of tutor responses."""
     PROBE = "PROBE"           # 追問 (Probing question)
@@ -133,6 +193,8 @@ class TutoringSession:
         self.standard_solution = standard_solution
         self.required_concepts = required_concepts or []
         self.covered_concepts: List[str] = []
+        # Set mirrors of the concept lists for O(1) membership; the lists keep order
+        self._covered_set: set = set()
         self.conversation_history: List[ConversationTurn] = []
         self.start_time = datetime.utcnow().timestamp()
         self.end_time: Optional[float] = None
@@ -187,8 +249,13 @@ class TutoringSession:
             concepts: List of newly covered concepts
         """
         for concept in concepts:
-            if concept not in self.covered_concepts:
-                self.covered_concepts.append(concept)
+            try:
+                if concept in self._covered_set:
+                    continue
+            except TypeError:
+                continue  # Unhashable LLM output (e.g. an object) never matches a concept id
+            self._covered_set.add(concept)
+            self.covered_concepts.append(concept)
     
     def calculate_concept_coverage(self) -> float:
         """
@@ -200,10 +267,8 @@ class TutoringSession:
         if not self.required_concepts:
             return 1.0  # No required concepts means full coverage
         
-        covered_count = sum(
-            1 for c in self.required_concepts
-            if c in self.covered_concepts
-        )
+        covered = self._covered_set
+        covered_count = sum(1 for c in self.required_concepts if c in covered)
         return covered_count / len(self.required_concepts)
     
     @property
@@ -248,7 +313,9 @@ class DialogEngine:
         llm_client: Optional[OllamaClient] = None,
         hint_controller: Optional[HintController] = None,
         prompt_builder: Optional[PromptBuilder] = None,
-        db: Optional[DBSession] = None
+        db: Optional[DBSession] = None,
+        fuse_analysis_and_response: bool = False,
+        rag_cache_size: int = 256
     ):
         """
         Initialize the Dialog Engine.
@@ -260,6 +327,9 @@ class DialogEngine:
             hint_controller: Hint Controller instance (creates default if None)
             prompt_builder: Prompt Builder instance (creates default if None)
             db: Optional database session for persistence
+            fuse_analysis_and_response: Ask for the analysis and the reply in one
+                LLM call instead of two
+            rag_cache_size: Number of RAG retrievals kept for reuse; 0 disables
         """
         self._fsm = fsm_controller or FSMController()
         self._rag = rag_module or RAGModule()
@@ -267,10 +337,20 @@ class DialogEngine:
         self._hint_controller = hint_controller or HintController(db=db)
         self._prompt_builder = prompt_builder or PromptBuilder()
         self._db = db
+        self._fuse_analysis_and_response = fuse_analysis_and_response
+        # LRU of retrieved documents keyed by (question, normalized query, concepts);
+        # hint requests re-query the question text every time. Only used by
+        # turn methods, which already hold the FSM lock.
+        self._rag_cache: "OrderedDict[tuple, List]" = OrderedDict()
+        self._rag_cache_size = rag_cache_size
         
         # Active sessions storage
         self._sessions: Dict[str, TutoringSession] = {}
+        # The FSM is shared by every session, so methods that drive it run one at a
+        # time; callers may then run turns off the event loop in worker threads
+        self._fsm_lock = threading.RLock()
     
+    @_holding_fsm_lock
     def start_session(
         self,
         question_id: str,
@@ -323,7 +403,12 @@ class DialogEngine:
         
         return session
     
-    def process_student_input(self, input_data: StudentInput) -> TutorResponse:
+    @_holding_fsm_lock
+    def process_student_input(
+        self,
+        input_data: StudentInput,
+        strict: bool = False
+    ) -> TutorResponse:
         """
         Process student input and generate a tutor response.
         
@@ -336,11 +421,22 @@ class DialogEngine:
         
         Args:
             input_data: The student's input
+            strict: If True, raise instead of returning a fallback response
+                for unknown or ended sessions
             
         Returns:
             TutorResponse with the tutor's response
+            
+        Raises:
+            SessionNotFoundError: If strict and the session does not exist
+            SessionInactiveError: If strict and the session has ended
         """
         session = self._sessions.get(input_data.session_id)
+        if strict:
+            if not session:
+                raise SessionNotFoundError(input_data.session_id)
+            if not session.is_active:
+                raise SessionInactiveError(input_data.session_id)
         if not session:
             return TutorResponse(
                 text="抱歉，找不到此會話。請重新開始。",
@@ -372,12 +468,19 @@ class DialogEngine:
             session=session
         )
         
-        # Analyze student input
-        analysis = self._analyze_student_input(
-            input_data=input_data,
-            session=session,
-            rag_documents=rag_result
-        )
+        # Analyze student input (and draft the reply in the same call when fused)
+        fused_reply = None
+        if self._fuse_analysis_and_response:
+            analysis, fused_reply = self._analyze_and_respond(
+                session=session,
+                rag_documents=rag_result
+            )
+        else:
+            analysis = self._analyze_student_input(
+                input_data=input_data,
+                session=session,
+                rag_documents=rag_result
+            )
         
         # Update FSM based on analysis
         analysis_event = FSMEvent(
@@ -390,12 +493,16 @@ class DialogEngine:
         if analysis.get("covered_concepts"):
             session.update_covered_concepts(analysis["covered_concepts"])
         
-        # Generate response based on new state
-        response = self._generate_response(
-            session=session,
-            analysis=analysis,
-            rag_documents=rag_result
-        )
+        # Generate response based on new state. A fused reply is written before
+        # coverage is known, so consolidation still gets its own summary call.
+        if fused_reply and new_state != FSMState.CONSOLIDATING:
+            response = self._build_tutor_response(fused_reply, analysis)
+        else:
+            response = self._generate_response(
+                session=session,
+                analysis=analysis,
+                rag_documents=rag_result
+            )
         
         # Record tutor response
         session.add_turn(
@@ -406,6 +513,7 @@ class DialogEngine:
         
         return response
     
+    @_holding_fsm_lock
     def end_session(self, session_id: str) -> SessionSummary:
         """
         End a tutoring session and generate summary.
@@ -462,6 +570,18 @@ class DialogEngine:
         
         return summary
     
+    def session_exists(self, session_id: str) -> bool:
+        """
+        Check whether a session exists without building its state.
+        
+        Args:
+            session_id: The session ID
+            
+        Returns:
+            True if the session is known to this engine
+        """
+        return session_id in self._sessions
+    
     def get_session_state(self, session_id: str) -> Optional[SessionState]:
         """
         Get the current state of a session.
@@ -500,12 +620,7 @@ class DialogEngine:
         Returns:
             True if this is a hint request
         """
-        hint_keywords = [
-            "給我提示", "提示", "幫幫我", "不知道", "不會",
-            "hint", "help", "卡住", "想不出來"
-        ]
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in hint_keywords)
+        return _HINT_KEYWORD_PATTERN.search(text.lower()) is not None
     
     def _handle_hint_request(
         self,
@@ -601,6 +716,12 @@ class DialogEngine:
         Returns:
             List of retrieved documents
         """
+        key = (session.question_id, query.strip().lower(), tuple(session.required_concepts))
+        cached = self._rag_cache.get(key)
+        if cached is not None:
+            self._rag_cache.move_to_end(key)
+            return list(cached)
+        
         context = RetrievalContext(
             question_id=session.question_id,
             knowledge_nodes=session.required_concepts,
@@ -609,6 +730,10 @@ class DialogEngine:
         )
         
         result = self._rag.retrieve(query, context)
+        if self._rag_cache_size > 0:
+            self._rag_cache[key] = list(result.documents)
+            while len(self._rag_cache) > self._rag_cache_size:
+                self._rag_cache.popitem(last=False)
         return result.documents
     
     def _analyze_student_input(
@@ -644,20 +769,11 @@ class DialogEngine:
         # Check if this is a fallback response (LLM unavailable)
         if llm_response.error and "fallback" in llm_response.error.lower():
             # Return a default analysis that encourages the student to continue
-            analysis = {
-                "logic_complete": False,
-                "logic_gap": False,
-                "logic_error": False,
-                "error_type": None,
-                "missing_concepts": [],
-                "covered_concepts": [],
-                "feedback": "請繼續說明你的解題思路。",
-                "continue_listening": True
-            }
+            analysis = _default_analysis()
         else:
             # Parse JSON response
             try:
-                analysis = json.loads(llm_response.text)
+                analysis = _loads_llm_json(llm_response.text)
             except json.JSONDecodeError:
                 # Default analysis if parsing fails
                 analysis = {
@@ -670,13 +786,75 @@ class DialogEngine:
                     "feedback": llm_response.text
                 }
         
-        # Calculate coverage
+        return self._apply_coverage(session, analysis)
+    
+    def _apply_coverage(
+        self,
+        session: TutoringSession,
+        analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Record the analysis' covered concepts and attach the session coverage.
+        
+        Args:
+            session: The current session
+            analysis: Analysis result dictionary
+            
+        Returns:
+            The analysis with "coverage" set
+        """
         covered = analysis.get("covered_concepts", [])
         session.update_covered_concepts(covered)
         analysis["coverage"] = session.calculate_concept_coverage()
         
         return analysis
     
+    def _analyze_and_respond(
+        self,
+        session: TutoringSession,
+        rag_documents: List
+    ) -> tuple[Dict[str, Any], Optional[str]]:
+        """
+        Analyze student input and draft the tutor's reply in one LLM call.
+        
+        Falls back to the default analysis, with no reply, when the combined
+        answer is not the expected JSON object; the caller then generates the
+        reply separately.
+        
+        Args:
+            session: The current session
+            rag_documents: Retrieved RAG documents
+            
+        Returns:
+            Tuple of (analysis, reply text or None if no usable reply)
+        """
+        system_prompt, user_prompt = self._prompt_builder.build_analysis_and_response_prompt(
+            context=self._build_prompt_context(session, rag_documents),
+            standard_solution=session.standard_solution
+        )
+        
+        llm_response = self._llm.generate(
+            prompt=user_prompt,
+            system=system_prompt
+        )
+        
+        parsed = None
+        if not (llm_response.error and "fallback" in llm_response.error.lower()):
+            try:
+                parsed = _loads_llm_json(llm_response.text)
+            except json.JSONDecodeError:
+                pass
+        
+        if not isinstance(parsed, dict) or not isinstance(parsed.get("analysis"), dict):
+            # A second analysis call would cost as much as the one that failed
+            return self._apply_coverage(session, _default_analysis()), None
+        
+        reply = parsed.get("response")
+        if not isinstance(reply, str) or not reply.strip():
+            reply = None
+        
+        return self._apply_coverage(session, parsed["analysis"]), reply
+    
     def _generate_response(
         self,
         session: TutoringSession,
@@ -696,6 +874,60 @@ class DialogEngine:
         """
         current_state = self._fsm.get_current_state()
         
+        # Generate response using LLM
+        system_prompt, user_prompt = self._prompt_builder.build_full_prompt(
+            state=current_state,
+            context=self._build_prompt_context(session, rag_documents)
+        )
+        
+        llm_response = self._llm.generate(
+            prompt=user_prompt,
+            system=system_prompt
+        )
+        
+        return self._build_tutor_response(llm_response.text, analysis)
+    
+    def _build_prompt_context(
+        self,
+        session: TutoringSession,
+        rag_documents: List
+    ) -> PromptContext:
+        """
+        Build the prompt context for the session's latest turn.
+        
+        Args:
+            session: The current session
+            rag_documents: Retrieved RAG documents
+            
+        Returns:
+            PromptContext
+        """
+        return PromptContext(
+            question_content=session.question_content,
+            student_input=session.conversation_history[-1].content if session.conversation_history else "",
+            conversation_history=session.get_conversation_as_dicts(),
+            rag_documents=rag_documents,
+            current_concept=session.required_concepts[0] if session.required_concepts else None,
+            concept_coverage=session.calculate_concept_coverage()
+        )
+    
+    def _build_tutor_response(
+        self,
+        text: str,
+        analysis: Dict[str, Any]
+    ) -> TutorResponse:
+        """
+        Wrap reply text in a TutorResponse for the current FSM state.
+        
+        Args:
+            text: The tutor's reply
+            analysis: The analysis result
+            
+        Returns:
+            TutorResponse
+        """
+        current_state = self._fsm.get_current_state()
+        
         # Determine response type based on state
         response_type_map = {
             FSMState.PROBING: ResponseType.PROBE,
@@ -708,27 +940,6 @@ class DialogEngine:
         }
         response_type = response_type_map.get(current_state, ResponseType.ACKNOWLEDGE)
         
-        # Build prompt context
-        prompt_context = PromptContext(
-            question_content=session.question_content,
-            student_input=session.conversation_history[-1].content if session.conversation_history else "",
-            conversation_history=session.get_conversation_as_dicts(),
-            rag_documents=rag_documents,
-            current_concept=session.required_concepts[0] if session.required_concepts else None,
-            concept_coverage=session.calculate_concept_coverage()
-        )
-        
-        # Generate response using LLM
-        system_prompt, user_prompt = self._prompt_builder.build_full_prompt(
-            state=current_state,
-            context=prompt_context
-        )
-        
-        llm_response = self._llm.generate(
-            prompt=user_prompt,
-            system=system_prompt
-        )
-        
         # Build suggested next step
         suggested_next = None
         if current_state == FSMState.CONSOLIDATING:
@@ -737,13 +948,14 @@ class DialogEngine:
             suggested_next = "思考一下剛才的問題"
         
         return TutorResponse(
-            text=llm_response.text,
+            text=text,
             response_type=response_type,
             related_concepts=analysis.get("covered_concepts", []),
             suggested_next_step=suggested_next,
             fsm_state=current_state
         )
     
+    @_holding_fsm_lock
     def handle_silence(
         self,
         session_id: str,
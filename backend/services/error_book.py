@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from backend.models.error_book import ErrorRecord
 from backend.models.question import Question
+from backend.services.metrics_summary_cache import invalidate_metrics_summary
 
 
 class ErrorCriteria:
@@ -131,6 +132,7 @@ class ErrorBookManager:
         self.db.add(error_record)
         self.db.commit()
         self.db.refresh(error_record)
+        invalidate_metrics_summary(student_id)
         return error_record
 
     def get_errors(
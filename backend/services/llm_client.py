@@ -57,6 +57,9 @@ class LLMConfig:
     temperature: float = 0.7
     top_p: float = 0.9
     num_ctx: int = 4096
+    # How long Ollama keeps the model (and its cached prompt prefix) loaded
+    # between requests; students often pause longer than the 5m default
+    keep_alive: Optional[str] = "30m"
     
     # Fallback configuration
     fallback_response: str = "很好，請繼續說明你的解題思路。你可以告訴我你打算怎麼解這道題？"
@@ -436,6 +439,10 @@ class OllamaClient:
         if system:
             payload["system"] = system
         
+        keep_alive = kwargs.get("keep_alive", self.config.keep_alive)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
         # Add any additional options
         for key in ["num_predict", "stop", "seed"]:
             if key in kwargs:
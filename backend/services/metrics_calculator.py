@@ -11,6 +11,7 @@ import uuid
 from sqlalchemy.orm import Session as DBSession
 
 from backend.models.metrics import LearningMetrics, Pause as PauseModel, HintUsage
+from backend.services.metrics_summary_cache import invalidate_metrics_summary
 
 
 @dataclass
@@ -282,6 +283,9 @@ class MetricsCalculator:
         
         self._db.add(learning_metrics)
         self._db.commit()
+        # Metrics rows only carry a session id; clearing every student's summary
+        # avoids a session lookup on this write path
+        invalidate_metrics_summary()
         
         return metrics.id
 
@@ -383,6 +387,7 @@ class MetricsCalculator:
         learning_metrics.focus_duration = metrics.focus_duration
         
         self._db.commit()
+        invalidate_metrics_summary()
         return True
 
     def delete_metrics(self, metrics_id: str) -> bool:
@@ -410,6 +415,7 @@ class MetricsCalculator:
         
         self._db.delete(learning_metrics)
         self._db.commit()
+        invalidate_metrics_summary()
         return True
 
     def get_student_metrics_history(
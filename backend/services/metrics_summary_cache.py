@@ -0,0 +1,48 @@
+"""
+Metrics summary cache for the AI Math Tutor system.
+Holds assembled KPI summaries per student so dashboard polling does not
+re-run the aggregate queries; services that write the underlying records
+invalidate it.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+# KPI values rarely change within a minute, so assembled summaries are
+# cached per (student_id, minute bucket) to absorb dashboard polling.
+SUMMARY_CACHE_BUCKET_SECONDS = 60
+
+_summary_cache: Dict[Tuple[str, int], Any] = {}
+_summary_cache_lock = threading.Lock()
+
+
+def _summary_bucket() -> int:
+    """Return the current summary cache bucket."""
+    return int(time.time() // SUMMARY_CACHE_BUCKET_SECONDS)
+
+
+def get_cached_summary(student_id: str) -> Optional[Any]:
+    """Return the summary cached for a student in the current bucket, if any."""
+    with _summary_cache_lock:
+        return _summary_cache.get((student_id, _summary_bucket()))
+
+
+def store_summary(student_id: str, summary: Any) -> None:
+    """Cache a student's summary for the current bucket."""
+    bucket = _summary_bucket()
+    with _summary_cache_lock:
+        # Entries from earlier buckets can never be hit again
+        for key in [k for k in _summary_cache if k[1] != bucket]:
+            del _summary_cache[key]
+        _summary_cache[(student_id, bucket)] = summary
+
+
+def invalidate_metrics_summary(student_id: Optional[str] = None) -> None:
+    """Drop cached summaries for one student, or for everyone if omitted."""
+    with _summary_cache_lock:
+        if student_id is None:
+            _summary_cache.clear()
+            return
+        for key in [k for k in _summary_cache if k[0] == student_id]:
+            del _summary_cache[key]
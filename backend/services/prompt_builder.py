@@ -212,6 +212,16 @@ HINT_LEVEL_INSTRUCTIONS = {
 }
 
 
+# Labels for retrieved document types in the reference section
+RAG_DOC_TYPE_LABELS = {
+    "SOLUTION": "解法",
+    "MISCONCEPTION": "常見迷思",
+    "CONCEPT": "概念說明",
+    "HINT": "提示",
+    "QUESTION": "相關題目"
+}
+
+
 class PromptBuilder:
     """
     Builder for constructing prompts for the AI Math Tutor.
@@ -263,11 +273,6 @@ class PromptBuilder:
             hint_instruction = HINT_LEVEL_INSTRUCTIONS.get(context.hint_level, "")
             base_prompt = f"{base_prompt}\n{hint_instruction}"
         
-        # Add RAG context if available
-        if context and context.rag_documents:
-            rag_context = self._format_rag_context(context.rag_documents)
-            base_prompt = f"{base_prompt}\n\n{rag_context}"
-        
         return base_prompt
     
     def build_user_prompt(
@@ -295,6 +300,11 @@ class PromptBuilder:
         if context.current_concept:
             parts.append(f"【目前概念】{context.current_concept}")
         
+        # Add RAG references after the fixed question parts and before the
+        # growing history, so the system prompt stays identical across turns
+        if context.rag_documents:
+            parts.append(self._format_rag_context(context.rag_documents))
+        
         # Add conversation history summary if available (includes student transcript)
         if context.conversation_history:
             history_summary = self._format_conversation_history(
@@ -357,16 +367,11 @@ class PromptBuilder:
         
         parts = ["【參考資料】"]
         
-        for i, doc in enumerate(documents[:max_docs]):
-            doc_type_labels = {
-                "SOLUTION": "解法",
-                "MISCONCEPTION": "常見迷思",
-                "CONCEPT": "概念說明",
-                "HINT": "提示",
-                "QUESTION": "相關題目"
-            }
-            
-            type_label = doc_type_labels.get(doc.content_type.value, "參考")
+        # Keep the most relevant documents, listed by id so retrieving the same set
+        # on a later turn yields identical prompt bytes (LLM prefix cache hits)
+        selected = sorted(documents[:max_docs], key=lambda doc: doc.id)
+        for i, doc in enumerate(selected):
+            type_label = RAG_DOC_TYPE_LABELS.get(doc.content_type.value, "參考")
             parts.append(f"\n{i + 1}. 【{type_label}】\n{doc.content}")
         
         return "\n".join(parts)
@@ -528,6 +533,74 @@ class PromptBuilder:
         
         return system_prompt, user_prompt
     
+    def build_analysis_and_response_prompt(
+        self,
+        context: PromptContext,
+        standard_solution: Optional[str] = None
+    ) -> tuple[str, str]:
+        """
+        Build one prompt that asks for both the analysis and the tutor's reply.
+        
+        The model reads the question, history and references once and answers
+        with {"analysis": {...}, "response": "..."}, replacing the separate
+        analysis and response calls.
+        
+        Args:
+            context: The prompt context
+            standard_solution: Optional standard solution for reference
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
+        system_prompt = f"""你是一位耐心且富有智慧的數學家教，採用蘇格拉底式教學法。請分析學生的解題思路，並直接回覆學生，以 JSON 格式回應。
+
+{CORE_PROHIBITION_RULES}
+
+回覆原則：
+- 若有邏輯錯誤：{self._get_state_instruction(FSMState.REPAIR, context)}
+- 若有邏輯缺漏：{self._get_state_instruction(FSMState.PROBING, context)}
+- 其他情況：肯定學生目前的思路，並鼓勵他們繼續說明。
+
+回應格式：
+{{
+    "analysis": {{
+        "logic_complete": true/false,  // 邏輯是否完整
+        "logic_gap": true/false,       // 是否有邏輯缺漏
+        "logic_error": true/false,     // 是否有邏輯錯誤
+        "error_type": "CALCULATION" | "CONCEPT" | "CARELESS" | null,  // 錯誤類型
+        "missing_concepts": [],        // 缺漏的概念列表（不要包含答案）
+        "covered_concepts": [],        // 已涵蓋的概念列表
+        "feedback": ""                 // 簡短回饋（不要透露答案）
+    }},
+    "response": ""                     // 給學生的回覆（不要透露答案）
+}}"""
+        
+        # Parts that stay the same across a session come first, so consecutive
+        # turns share the longest possible prompt prefix
+        user_parts = []
+        if context.question_content:
+            user_parts.append(f"【題目】\n{context.question_content}")
+        if standard_solution:
+            user_parts.append(f"【標準解法（僅供內部分析參考，不要在回饋中透露）】\n{standard_solution}")
+        if context.current_concept:
+            user_parts.append(f"【目前概念】{context.current_concept}")
+        if context.rag_documents:
+            user_parts.append(self._format_rag_context(context.rag_documents))
+        if context.conversation_history:
+            history_summary = self._format_conversation_history(
+                context.conversation_history,
+                max_turns=5
+            )
+            user_parts.append(f"【對話紀錄（含學生逐字稿）】\n{history_summary}")
+        if context.student_input:
+            user_parts.append(f"【學生最新回答（語音逐字稿）】\n{context.student_input}")
+        
+        user_parts.append("請分析學生的回答並回覆學生，以 JSON 格式回應。注意：feedback 與 response 欄位中絕對不要包含答案或完整解法。")
+        
+        user_prompt = "\n\n".join(user_parts)
+        
+        return system_prompt, user_prompt
+    
     def get_misconception_check_prompt(
         self,
         student_input: str,
@@ -6,8 +6,8 @@ import csv
 import io
 import json
 import uuid
-from typing import List, Optional, Dict, Any, Union
-from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Sequence, Union
+from sqlalchemy.orm import Session, selectinload
 
 from backend.models.question import Question, Misconception, Hint, question_knowledge_nodes
 from backend.models.knowledge import KnowledgeNode
@@ -21,8 +21,8 @@ class QuestionCriteria:
         subject: Optional[str] = None,
         unit: Optional[str] = None,
         difficulty: Optional[int] = None,
-        knowledge_nodes: Optional[List[str]] = None,
-        exclude_ids: Optional[List[str]] = None,
+        knowledge_nodes: Optional[Sequence[str]] = None,
+        exclude_ids: Optional[Sequence[str]] = None,
         question_type: Optional[str] = None
     ):
         self.subject = subject
@@ -83,13 +83,20 @@ class QuestionBankManager:
         """
         Filter questions based on given criteria.
         
+        Knowledge nodes, hints and misconceptions are loaded with one
+        IN query each rather than lazily per question.
+        
         Args:
             criteria: QuestionCriteria object with filter parameters
             
         Returns:
             List of Question objects matching the criteria
         """
-        query = self.db.query(Question)
+        query = self.db.query(Question).options(
+            selectinload(Question.knowledge_nodes),
+            selectinload(Question.hints),
+            selectinload(Question.misconceptions),
+        )
         
         if criteria.subject:
             query = query.filter(Question.subject == criteria.subject)
@@ -128,6 +135,27 @@ class QuestionBankManager:
             Question.id == question_id
         ).first()
 
+    def get_knowledge_node_ids(self, question_id: str) -> List[str]:
+        """
+        Get the IDs of the knowledge nodes linked to a question.
+        
+        Reads the association table directly so no KnowledgeNode rows
+        are loaded just to access their IDs.
+        
+        Args:
+            question_id: The unique identifier of the question
+            
+        Returns:
+            List of knowledge node IDs
+        """
+        return [
+            node_id for (node_id,) in self.db.query(
+                question_knowledge_nodes.c.node_id
+            ).filter(
+                question_knowledge_nodes.c.question_id == question_id
+            )
+        ]
+
     def get_similar_questions(
         self,
         question_id: str,
@@ -148,7 +176,7 @@ class QuestionBankManager:
             return []
         
         # Get knowledge node IDs for the question
-        node_ids = [node.id for node in question.knowledge_nodes]
+        node_ids = self.get_knowledge_node_ids(question_id)
         
         if not node_ids:
             # Fallback: find questions with same subject and unit
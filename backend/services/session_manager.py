@@ -14,6 +14,7 @@ from backend.models.session import Session as SessionModel, ConversationTurn as
 from backend.models.question import Question
 from backend.models.knowledge import KnowledgeNode
 from backend.services.fsm_controller import FSMState
+from backend.services.metrics_summary_cache import invalidate_metrics_summary
 
 
 @dataclass
@@ -93,6 +94,7 @@ class SessionManager:
         self._db.add(session)
         self._db.commit()
         self._db.refresh(session)
+        invalidate_metrics_summary(student_id)
         
         return session
     
@@ -137,6 +139,7 @@ class SessionManager:
         
         self._db.commit()
         self._db.refresh(session)
+        invalidate_metrics_summary(session.student_id)
         
         return session
     
@@ -274,6 +277,7 @@ class SessionManager:
         session.concept_coverage = coverage
         self._db.commit()
         self._db.refresh(session)
+        invalidate_metrics_summary(session.student_id)
         
         return session
     
@@ -383,8 +387,10 @@ class SessionManager:
         ).delete()
         
         # Delete the session
+        student_id = session.student_id
         self._db.delete(session)
         self._db.commit()
+        invalidate_metrics_summary(student_id)
         
         return True
     
@@ -9,25 +9,40 @@ Tests:
 """
 import pytest
 import httpx
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from backend.app.main import app
 from backend.models.database import Base, get_db
+from backend.routers.subjects import clear_catalog_cache
+from backend.services.metrics_summary_cache import invalidate_metrics_summary
+from backend.services.session_manager import SessionManager
+from backend.services.fsm_controller import FSMState
 from backend.models.question import Question, Hint, Misconception
 from backend.models.knowledge import KnowledgeNode
 from backend.models.student import Student
 from backend.models.error_book import ErrorRecord
 from backend.models.session import Session as SessionModel
-from backend.models.metrics import LearningMetrics
+from backend.models.metrics import LearningMetrics, HintUsage
+from backend.models.user import User
+from backend.models.subject import Subject, Unit
+from backend.models.question_v2 import QuestionV2, MistakeReason, Difficulty
 
 
 # Test database setup
 @pytest.fixture(scope="function")
 def test_db():
     """Create a fresh test database for each test."""
-    engine = create_engine("sqlite:///:memory:", echo=False)
+    # StaticPool shares one connection so sync endpoints running in the
+    # threadpool see the same in-memory database
+    engine = create_engine(
+        "sqlite:///:memory:",
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     Base.metadata.create_all(bind=engine)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = TestingSessionLocal()
@@ -57,6 +72,8 @@ async def client(override_get_db):
     async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
     app.dependency_overrides.clear()
+    clear_catalog_cache()
+    invalidate_metrics_summary()
 
 
 @pytest.fixture
@@ -177,6 +194,18 @@ async def test_filter_questions_by_difficulty(client, sample_question):
     assert data["total"] == 0
 
 
+@pytest.mark.asyncio
+async def test_filter_questions_by_comma_separated_ids(client, sample_question):
+    """Test filtering questions by comma-separated knowledge nodes and exclusions."""
+    response = await client.get("/api/questions?knowledge_nodes=node-1,node-2")
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    
+    response = await client.get("/api/questions?exclude_ids=q-0,q-1")
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+
+
 @pytest.mark.asyncio
 async def test_get_question_by_id(client, sample_question):
     """Test getting a question by ID."""
@@ -353,3 +382,462 @@ async def test_get_overview(client, sample_student):
     assert data["student_id"] == "student-1"
     assert data["total_sessions"] == 0
     assert "error_statistics" in data
+
+
+# ============== Student API Tests ==============
+
+@pytest.mark.asyncio
+async def test_get_student_mistakes_streams_json(client, test_db):
+    """Test the streamed mistakes response decodes to the expected payload."""
+    user = User(email="s@example.com", password_hash="x", full_name="學生")
+    subject = Subject(subject_name="數學")
+    test_db.add_all([user, subject])
+    test_db.flush()
+    unit = Unit(subject_id=subject.id, unit_name="一元一次方程式")
+    test_db.add(unit)
+    test_db.flush()
+    questions = [
+        QuestionV2(unit_id=unit.id, question_text=f"題目 {i}", answer_text=str(i))
+        for i in range(3)
+    ]
+    test_db.add_all(questions)
+    test_db.flush()
+    for i, q in enumerate(questions):
+        test_db.add(MistakeReason(
+            student_id=user.id,
+            question_id=q.id,
+            reason_type="計算錯誤",
+            recorded_at=datetime(2024, 1, 1 + i)
+        ))
+    test_db.commit()
+    
+    response = await client.get("/api/student/mistakes", headers={"user-id": str(user.id)})
+    assert response.status_code == 200
+    mistakes = response.json()["mistakes"]
+    assert [m["question_text"] for m in mistakes] == ["題目 2", "題目 1", "題目 0"]
+    assert mistakes[0]["subject_name"] == "數學"
+    assert mistakes[0]["last_recorded_at"] == "2024-01-03T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_get_student_mistakes_empty(client):
+    """Test the mistakes stream is a valid empty list."""
+    response = await client.get("/api/student/mistakes", headers={"user-id": "1"})
+    assert response.status_code == 200
+    assert response.json() == {"mistakes": []}
+
+
+@pytest.mark.asyncio
+async def test_get_student_stats(client, test_db):
+    """Test student statistics aggregate per student."""
+    users = [
+        User(email=f"s{i}@example.com", password_hash="x", full_name=f"學生{i}")
+        for i in range(2)
+    ]
+    subject = Subject(subject_name="數學")
+    test_db.add_all(users + [subject])
+    test_db.flush()
+    unit = Unit(subject_id=subject.id, unit_name="因式分解")
+    test_db.add(unit)
+    test_db.flush()
+    question = QuestionV2(unit_id=unit.id, question_text="題目")
+    test_db.add(question)
+    test_db.flush()
+    test_db.add_all([
+        MistakeReason(student_id=users[0].id, question_id=question.id, reason_type="粗心",
+                      recorded_at=datetime.utcnow()),
+        MistakeReason(student_id=users[0].id, question_id=question.id, reason_type="觀念",
+                      recorded_at=datetime(2020, 1, 1)),
+        MistakeReason(student_id=users[1].id, question_id=question.id, reason_type="粗心",
+                      recorded_at=datetime.utcnow()),
+    ])
+    test_db.commit()
+    
+    response = await client.get("/api/student/stats", headers={"user-id": str(users[0].id)})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totalMistakes"] == 1
+    assert data["weeklyMistakes"] == 1
+    assert sorted((r["reason_type"], r["count"]) for r in data["reasonDistribution"]) == [
+        ("粗心", 1), ("觀念", 1)
+    ]
+    
+    # Second student reuses the cached statements with different parameters
+    response = await client.get("/api/student/stats", headers={"user-id": str(users[1].id)})
+    data = response.json()
+    assert data["reasonDistribution"] == [{"reason_type": "粗心", "count": 1}]
+
+
+# ============== Student Metrics API Tests ==============
+
+@pytest.fixture
+def sample_learning_history(test_db, sample_student, sample_question):
+    """Create sessions with metrics, hints and errors for the sample student."""
+    now = datetime.utcnow()
+    second_question = Question(
+        id="q-2",
+        content="因式分解: x^2 - 1",
+        type="CALCULATION",
+        subject="數學",
+        unit="多項式",
+        difficulty=2,
+        standard_solution="(x+1)(x-1)"
+    )
+    test_db.add(second_question)
+    sessions = [
+        SessionModel(
+            id="session-1",
+            student_id=sample_student.id,
+            question_id="q-1",
+            start_time=now - timedelta(days=1),
+            end_time=now - timedelta(days=1) + timedelta(minutes=30),
+            concept_coverage=0.9
+        ),
+        SessionModel(
+            id="session-2",
+            student_id=sample_student.id,
+            question_id="q-2",
+            start_time=now,
+            end_time=now + timedelta(minutes=10),
+            concept_coverage=0.5
+        ),
+    ]
+    test_db.add_all(sessions)
+    test_db.add_all([
+        LearningMetrics(id="m-1", session_id="session-1", wpm=120.0, pause_rate=0.1,
+                        hint_dependency=0.2, concept_coverage=0.9, focus_duration=1200.0),
+        LearningMetrics(id="m-2", session_id="session-2", wpm=80.0, pause_rate=0.3,
+                        hint_dependency=0.4, concept_coverage=0.5, focus_duration=600.0),
+        HintUsage(id="h-1", session_id="session-2", hint_level=1, timestamp=now),
+        HintUsage(id="h-2", session_id="session-2", hint_level=2, timestamp=now),
+        ErrorRecord(id="e-1", student_id=sample_student.id, question_id="q-1",
+                    session_id="session-1", student_answer="x = 3", correct_answer="x = 2",
+                    error_type="CALCULATION", concept="移項", unit="代數", timestamp=now,
+                    recurrence_count=1),
+        ErrorRecord(id="e-2", student_id=sample_student.id, question_id="q-2",
+                    session_id="session-2", student_answer="x^2", correct_answer="(x+1)(x-1)",
+                    error_type="CONCEPT", concept="平方差", unit="多項式", timestamp=now,
+                    is_repaired=True),
+    ])
+    test_db.commit()
+    return sessions
+
+
+@pytest.mark.asyncio
+async def test_get_session_history(client, sample_learning_history):
+    """Test paginated session history with per-session metrics."""
+    response = await client.get("/api/student/metrics/sessions?student_id=student-1&page_size=1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_count"] == 2
+    assert data["has_more"] is True
+    assert len(data["sessions"]) == 1
+    latest = data["sessions"][0]
+    assert latest["session_id"] == "session-2"
+    assert latest["unit"] == "多項式"
+    assert latest["duration_minutes"] == 10.0
+    assert latest["wpm"] == 80.0
+    assert latest["hint_used"] == 2
+    assert latest["mistakes_count"] == 1
+    
+    response = await client.get("/api/student/metrics/sessions?student_id=student-1&page=2&page_size=1")
+    data = response.json()
+    assert data["has_more"] is False
+    assert data["sessions"][0]["session_id"] == "session-1"
+    assert data["sessions"][0]["unit"] == "代數"
+    assert data["sessions"][0]["hint_used"] == 0
+    
+    response = await client.get("/api/student/metrics/sessions?student_id=student-1&page=3&page_size=1")
+    data = response.json()
+    assert data["sessions"] == []
+    assert data["total_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_session_history_multiple_metrics(client, test_db, sample_learning_history):
+    """Test a session with several metrics rows is listed and counted once."""
+    test_db.add(LearningMetrics(id="m-3", session_id="session-2", wpm=100.0, pause_rate=0.1,
+                                hint_dependency=0.4, concept_coverage=0.5, focus_duration=300.0))
+    test_db.commit()
+    
+    response = await client.get("/api/student/metrics/sessions?student_id=student-1")
+    data = response.json()
+    assert data["total_count"] == 2
+    assert [s["session_id"] for s in data["sessions"]] == ["session-2", "session-1"]
+    assert data["sessions"][0]["wpm"] == 90.0
+    assert data["sessions"][0]["hint_used"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_session_history_empty(client, sample_student):
+    """Test session history for a student without sessions."""
+    response = await client.get("/api/student/metrics/sessions?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sessions"] == []
+    assert data["total_count"] == 0
+    assert data["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_summary(client, sample_learning_history):
+    """Test KPI summary aggregates over the student's sessions, metrics and errors."""
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sessions"] == 2
+    assert data["total_practice_time_minutes"] == 40.0
+    assert data["streak_days"] == 2
+    assert data["accuracy_rate"]["value"] == 50.0
+    assert data["accuracy_rate"]["confidence"]["sample_count"] == 2
+    assert data["accuracy_rate"]["trend_direction"] == "stable"
+    assert data["avg_wpm"]["value"] == 100.0
+    assert data["avg_wpm"]["confidence"]["sample_count"] == 2
+    assert data["error_recurrence_rate"]["value"] == 50.0
+    assert data["focus_duration_today"]["value"] == 10.0
+    assert data["focus_duration_today"]["confidence"]["sample_count"] == 1
+    assert data["hint_dependency"]["value"] == 30.0
+    assert data["pause_ratio"]["value"] == 20.0
+    assert data["concept_coverage"]["value"] == 70.0
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_summary_empty(client, sample_student):
+    """Test KPI summary for a student without any data."""
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sessions"] == 0
+    assert data["total_practice_time_minutes"] == 0.0
+    assert data["streak_days"] == 0
+    assert data["accuracy_rate"]["value"] == 0.0
+    assert data["avg_wpm"]["value"] == 0.0
+    assert data["focus_duration_today"]["value"] == 0.0
+    assert data["accuracy_rate"]["confidence"]["message"] == "尚無數據"
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_summary_cached(client, test_db, sample_student):
+    """Test KPI summary is served from cache until invalidated."""
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 0
+    
+    test_db.add(SessionModel(id="session-new", student_id="student-1", start_time=datetime.utcnow()))
+    test_db.commit()
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 0
+    
+    invalidate_metrics_summary("student-1")
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_summary_invalidated_by_session_end(client, test_db, sample_student):
+    """Test ending a session through SessionManager drops the cached summary."""
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 0
+    
+    test_db.add(SessionModel(id="session-new", student_id="student-1", start_time=datetime.utcnow()))
+    test_db.commit()
+    SessionManager(test_db).end_session("session-new", FSMState.CONSOLIDATING, 1.0)
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_summary_invalidated_by_session_create_and_delete(client, test_db, sample_student):
+    """Test creating and deleting sessions through SessionManager drops the cached summary."""
+    manager = SessionManager(test_db)
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 0
+    
+    session = manager.create_session("student-1", "q-1")
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 1
+    
+    manager.delete_session(session.id)
+    response = await client.get("/api/student/metrics/summary?student_id=student-1")
+    assert response.json()["total_sessions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_heatmap_with_history(client, sample_learning_history):
+    """Test heatmap mastery counts errors and sessions linked to each node."""
+    response = await client.get("/api/dashboard/heatmap?student_id=student-1")
+    assert response.status_code == 200
+    node = response.json()["nodes"][0]
+    assert node["node_id"] == "node-1"
+    assert node["error_count"] == 1
+    assert node["total_attempts"] == 2
+    assert node["mastery_score"] == 0.5
+    assert node["mastery_level"] == "yellow"
+    assert node["concept_coverage"] == 0.9
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_trends(client, sample_learning_history):
+    """Test daily trend series and errors by unit."""
+    response = await client.get("/api/student/metrics/trends?student_id=student-1&period=week")
+    assert response.status_code == 200
+    data = response.json()
+    yesterday = sample_learning_history[0].start_time.strftime("%Y-%m-%d")
+    today = sample_learning_history[1].start_time.strftime("%Y-%m-%d")
+    assert [(p["date"], p["value"]) for p in data["accuracy_trend"]] == [(yesterday, 90.0), (today, 50.0)]
+    assert [(p["date"], p["value"]) for p in data["wpm_trend"]] == [(yesterday, 120.0), (today, 80.0)]
+    assert [(p["date"], p["value"]) for p in data["focus_trend"]] == [(yesterday, 20.0), (today, 10.0)]
+    assert [(p["date"], p["value"]) for p in data["sessions_by_day"]] == [(yesterday, 1.0), (today, 1.0)]
+    assert {p["label"]: p["value"] for p in data["errors_by_unit"]} == {"代數": 1.0, "多項式": 1.0}
+    assert data["confidence"]["sample_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_trends_multiple_metrics(client, test_db, sample_learning_history):
+    """Test a session with several metrics rows counts once in the daily averages."""
+    test_db.add(SessionModel(id="session-3", student_id="student-1", question_id="q-1",
+                             start_time=datetime.utcnow(), concept_coverage=0.7))
+    test_db.add_all([
+        LearningMetrics(id="m-3", session_id="session-2", wpm=100.0, focus_duration=300.0),
+        LearningMetrics(id="m-4", session_id="session-3", wpm=60.0, focus_duration=300.0),
+    ])
+    test_db.commit()
+    
+    response = await client.get("/api/student/metrics/trends?student_id=student-1&period=week")
+    data = response.json()
+    assert data["accuracy_trend"][-1]["value"] == 60.0
+    assert data["wpm_trend"][-1]["value"] == 75.0
+    assert data["focus_trend"][-1]["value"] == 20.0
+    assert data["sessions_by_day"][-1]["value"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_trends_without_metrics(client, test_db, sample_student):
+    """Test days without learning metrics are left out of the metric trends."""
+    test_db.add(SessionModel(id="session-bare", student_id="student-1", start_time=datetime.utcnow()))
+    test_db.commit()
+    
+    response = await client.get("/api/student/metrics/trends?student_id=student-1&period=all")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accuracy_trend"] == []
+    assert data["wpm_trend"] == []
+    assert data["focus_trend"] == []
+    assert [p["value"] for p in data["sessions_by_day"]] == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_get_error_analysis(client, sample_learning_history):
+    """Test error analysis grouping by type and unit."""
+    response = await client.get("/api/student/metrics/errors?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_errors"] == 2
+    assert data["repaired_errors"] == 1
+    assert data["repair_rate"] == 0.5
+    by_type = {item["error_type"]: item for item in data["errors_by_type"]}
+    assert by_type["CALCULATION"]["count"] == 1
+    assert by_type["CALCULATION"]["recurrence_rate"] == 1.0
+    assert by_type["CALCULATION"]["related_concepts"] == ["移項"]
+    assert by_type["CONCEPT"]["recurrence_count"] == 0
+    assert by_type["CONCEPT"]["last_occurrence"] is not None
+    assert data["errors_by_unit"] == {"代數": 1, "多項式": 1}
+    assert [item["error_type"] for item in data["recurring_errors"]] == ["CALCULATION"]
+
+
+# ============== Subjects API Tests ==============
+
+@pytest.mark.asyncio
+async def test_get_units_with_subject_names(client, test_db):
+    """Test units are listed with their subject names."""
+    algebra = Subject(subject_name="代數")
+    geometry = Subject(subject_name="幾何")
+    test_db.add_all([algebra, geometry])
+    test_db.flush()
+    test_db.add_all([
+        Unit(subject_id=algebra.id, unit_name="一元一次方程式"),
+        Unit(subject_id=geometry.id, unit_name="三角形"),
+    ])
+    test_db.commit()
+    
+    response = await client.get("/api/units")
+    assert response.status_code == 200
+    units = {u["unit_name"]: u["subject_name"] for u in response.json()["units"]}
+    assert units == {"一元一次方程式": "代數", "三角形": "幾何"}
+
+
+@pytest.mark.asyncio
+async def test_get_subjects_cached(client, test_db):
+    """Test subjects are served from the catalog cache until it is cleared."""
+    test_db.add(Subject(subject_name="數學"))
+    test_db.commit()
+    
+    response = await client.get("/api/subjects")
+    assert [s["subject_name"] for s in response.json()["subjects"]] == ["數學"]
+    
+    test_db.add(Subject(subject_name="自然"))
+    test_db.commit()
+    response = await client.get("/api/subjects")
+    assert [s["subject_name"] for s in response.json()["subjects"]] == ["數學"]
+    
+    clear_catalog_cache()
+    response = await client.get("/api/subjects")
+    assert [s["subject_name"] for s in response.json()["subjects"]] == ["數學", "自然"]
+
+
+# ============== Teacher API Tests ==============
+
+@pytest.mark.asyncio
+async def test_import_questions(client, test_db):
+    """Test bulk question import skips incomplete rows and resolves difficulty."""
+    subject = Subject(subject_name="數學")
+    test_db.add(subject)
+    test_db.flush()
+    unit = Unit(subject_id=subject.id, unit_name="一元一次方程式")
+    test_db.add(unit)
+    test_db.commit()
+    
+    response = await client.post(
+        "/api/teacher/questions/import",
+        headers={"user-id": "1"},
+        json={
+            "unit_id": unit.id,
+            "difficulty": "easy",
+            "questions": [
+                {"question_text": "2x = 4", "answer_text": "x = 2"},
+                {"question_text": "3x = 9", "answer_text": "x = 3", "difficulty": "hard"},
+                {"question_text": "x + 1 = 2", "answer_text": "x = 1", "difficulty": "unknown"},
+                {"question_text": "沒有答案", "answer_text": ""},
+            ]
+        }
+    )
+    assert response.status_code == 200
+    assert response.json()["imported_count"] == 3
+    
+    questions = test_db.query(QuestionV2).order_by(QuestionV2.id).all()
+    assert [q.difficulty for q in questions] == [Difficulty.EASY, Difficulty.HARD, Difficulty.MEDIUM]
+    assert all(q.unit_id == unit.id and q.created_at is not None for q in questions)
+
+
+@pytest.mark.asyncio
+async def test_get_error_analysis_empty(client, sample_student):
+    """Test error analysis for a student without errors."""
+    response = await client.get("/api/student/metrics/errors?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_errors"] == 0
+    assert data["repair_rate"] == 0.0
+    assert data["errors_by_type"] == []
+    assert data["errors_by_unit"] == {}
+
+
+@pytest.mark.asyncio
+async def test_get_overview_with_history(client, sample_learning_history):
+    """Test dashboard overview totals over the session history."""
+    response = await client.get("/api/dashboard/overview?student_id=student-1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sessions"] == 2
+    assert data["completed_sessions"] == 2
+    assert data["average_coverage"] == pytest.approx(0.7)
+    assert data["total_duration_minutes"] == pytest.approx(40.0)
+    assert [s["session_id"] for s in data["recent_sessions"]] == ["session-2", "session-1"]
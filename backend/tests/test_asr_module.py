@@ -130,6 +130,117 @@ class TestTranscriptionStream:
         # Should not raise, and second callback should still work
         stream._emit_partial("test")
         assert len(results) == 1
+    
+    def test_failing_callback_is_dropped(self):
+        """Test a callback that raised is not called again."""
+        stream = TranscriptionStream()
+        calls = []
+        
+        def failing_callback(text):
+            calls.append(text)
+            raise ValueError("Callback error")
+        
+        stream.on_partial_result(failing_callback)
+        stream._emit_partial("first")
+        stream._emit_partial("second")
+        
+        assert calls == ["first"]
+    
+    def test_worker_transcribes_batched_chunks(self):
+        """Test buffered chunks are read together and transcribed once."""
+        import threading
+        import numpy as np
+        
+        calls = []
+        done = threading.Event()
+        
+        def transcriber(samples):
+            calls.append(samples.copy())
+            done.set()
+            return TranscriptionResult(text="ok", confidence=1.0)
+        
+        stream = TranscriptionStream(transcriber=transcriber)
+        results = []
+        stream.on_final_result(lambda result: results.append(result))
+        
+        # Buffer chunks before the worker starts so they land in one batch
+        stream._is_active = True
+        stream.add_audio_chunk(np.array([16384, -16384], dtype=np.int16).tobytes())
+        stream.add_audio_chunk(np.array([8192], dtype=np.int16).tobytes())
+        stream._is_active = False
+        
+        stream.start()
+        assert done.wait(timeout=2.0)
+        stream.stop()
+        
+        assert len(calls) == 1
+        assert calls[0].dtype == np.float32
+        assert calls[0].tolist() == [0.5, -0.5, 0.25]
+        assert [r.text for r in results] == ["ok"]
+    
+    def test_ring_buffer_wraps_around(self):
+        """Test writes past the end of the ring buffer wrap to the start."""
+        import numpy as np
+        
+        stream = TranscriptionStream(max_audio_length=4, sample_rate=1)
+        stream._is_active = True
+        stream._read = 3
+        stream.add_audio_chunk(np.array([1, 2, 3], dtype=np.int16).tobytes())
+        
+        assert stream._size == 3
+        assert (stream._ring * 32768).tolist() == [2.0, 3.0, 0.0, 1.0]
+
+    def test_full_buffer_drops_chunk_without_blocking(self):
+        """Test a non-blocking add reports back-pressure instead of waiting."""
+        import numpy as np
+        from backend.services.asr_module import ASRBackpressureError
+
+        stream = TranscriptionStream(max_audio_length=4, sample_rate=1)
+        errors = []
+        stream.on_error(lambda e: errors.append(e))
+        stream._is_active = True
+        stream.add_audio_chunk(np.array([1, 2, 3], dtype=np.int16).tobytes())
+        stream.add_audio_chunk(np.array([4, 5], dtype=np.int16).tobytes(), block=False)
+
+        assert stream._size == 3
+        assert len(errors) == 1
+        assert isinstance(errors[0], ASRBackpressureError)
+    
+    def test_vad_drops_silence_after_hangover(self):
+        """Test silent chunks are dropped once the post-speech hangover is used up."""
+        import numpy as np
+        
+        stream = TranscriptionStream(vad_threshold=0.01, silence_hangover=0.02)
+        stream._is_active = True
+        silence = np.zeros(320, dtype=np.int16).tobytes()
+        speech = np.full(320, 8000, dtype=np.int16).tobytes()
+        
+        stream.add_audio_chunk(silence)  # Leading silence is dropped
+        assert stream._size == 0
+        
+        stream.add_audio_chunk(speech)
+        stream.add_audio_chunk(silence)  # Within the 20ms hangover
+        assert stream._size == 640
+        
+        stream.add_audio_chunk(silence)  # Past the hangover
+        assert stream._size == 640
+    
+    def test_worker_reports_transcriber_errors(self):
+        """Test transcriber failures are sent to error callbacks."""
+        import threading
+        
+        failed = threading.Event()
+        
+        def transcriber(audio_data):
+            raise ASRTranscriptionError("boom")
+        
+        stream = TranscriptionStream(transcriber=transcriber)
+        stream.on_error(lambda e: failed.set())
+        stream.start()
+        stream.add_audio_chunk(b"\x00\x00")
+        
+        assert failed.wait(timeout=2.0)
+        stream.stop()
 
 
 class TestASRModule:
@@ -181,6 +292,240 @@ class TestASRModule:
         assert stream2.is_active
         
         module.stop_streaming()
+    
+    def test_transcribe_audio_data_passes_array(self):
+        """Test raw PCM is resampled and handed to Whisper as a float32 array."""
+        import numpy as np
+        
+        received = {}
+        
+        class FakeWhisper:
+            def transcribe(self, audio, **kwargs):
+                received["audio"] = audio
+                return {"text": " x平方 ", "segments": [{"end": 1.0, "no_speech_prob": 0.1}]}
+        
+        module = ASRModule()
+        module._model = FakeWhisper()
+        module._is_loaded = True
+        
+        pcm = np.zeros(8000, dtype=np.int16).tobytes()
+        result = module.transcribe_audio_data(pcm, sample_rate=8000)
+        
+        assert isinstance(received["audio"], np.ndarray)
+        assert received["audio"].dtype == np.float32
+        assert len(received["audio"]) == 16000
+        assert result.text == "x平方"
+        assert result.confidence == pytest.approx(0.9)
+
+    def test_transcribe_audio_data_reuses_buffer(self):
+        """Test 16kHz PCM is decoded into the module's reusable float32 buffer."""
+        import numpy as np
+
+        received = []
+
+        class FakeWhisper:
+            def transcribe(self, audio, **kwargs):
+                received.append(audio.copy())
+                return {"text": "x", "segments": []}
+
+        module = ASRModule()
+        module._model = FakeWhisper()
+        module._is_loaded = True
+
+        module.transcribe_audio_data(np.full(1600, 16384, dtype=np.int16).tobytes())
+        module.transcribe_audio_data(np.full(800, -32768, dtype=np.int16).tobytes())
+
+        np.testing.assert_array_equal(received[0], np.full(1600, 0.5, dtype=np.float32))
+        np.testing.assert_array_equal(received[1], np.full(800, -1.0, dtype=np.float32))
+        assert module._f32_local.buf.size == 1600
+
+    def test_repeated_audio_uses_result_cache(self, tmp_path):
+        """Test identical audio content is transcribed once, even under a new file name."""
+        import numpy as np
+
+        calls = []
+
+        class FakeWhisper:
+            def transcribe(self, audio, **kwargs):
+                calls.append(audio)
+                return {"text": " 懂了嗎 ", "segments": []}
+
+        module = ASRModule(ASRConfig(result_cache_size=1))
+        module._model = FakeWhisper()
+        module._is_loaded = True
+
+        first, second = tmp_path / "a.wav", tmp_path / "b.wav"
+        first.write_bytes(b"same clip")
+        second.write_bytes(b"same clip")
+
+        result = module.transcribe(str(first))
+        result.text = "mutated"
+        assert module.transcribe(str(second)).text == "懂了嗎"
+        assert len(calls) == 1
+
+        module.transcribe(np.zeros(16, dtype=np.float32))  # Evicts the file entry
+        module.transcribe(str(first))
+        assert len(calls) == 3
+
+    def test_transcribe_audio_data_converts_on_device(self, monkeypatch):
+        """Test openai-whisper on an accelerator gets int16 uploaded and scaled there."""
+        import sys
+        import types
+        import numpy as np
+
+        calls = []
+
+        class FakeTensor:
+            def __init__(self, data):
+                self.data = data
+
+            def to(self, target, non_blocking=False):
+                calls.append(target)
+                return FakeTensor(self.data.astype(np.float32) if target == "float32" else self.data)
+
+            def mul_(self, factor):
+                self.data *= factor
+                return self
+
+        fake_torch = types.SimpleNamespace(
+            int16="int16",
+            float32="float32",
+            frombuffer=lambda buf, dtype: FakeTensor(np.frombuffer(bytes(buf), dtype=np.int16)),
+        )
+        monkeypatch.setitem(sys.modules, "torch", fake_torch)
+
+        received = {}
+
+        class FakeWhisper:
+            def transcribe(self, audio, **kwargs):
+                received["audio"] = audio
+                return {"text": "x", "segments": []}
+
+        module = ASRModule(ASRConfig(device="cuda"))
+        module._model = FakeWhisper()
+        module._backend = "openai"
+        module._is_loaded = True
+
+        module.transcribe_audio_data(np.full(4, 16384, dtype=np.int16).tobytes())
+
+        assert calls == ["cuda", "float32"]
+        assert isinstance(received["audio"], FakeTensor)
+        assert received["audio"].data.tolist() == [0.5] * 4
+
+    def test_faster_whisper_backend_result(self):
+        """Test faster-whisper segments are converted into a TranscriptionResult."""
+        from types import SimpleNamespace
+        
+        class FakeFasterWhisper:
+            def transcribe(self, audio, **kwargs):
+                assert "fp16" not in kwargs
+                assert kwargs["vad_filter"] is True
+                segments = iter([
+                    SimpleNamespace(text="x平方", end=0.8, no_speech_prob=0.2, words=None),
+                    SimpleNamespace(text="加一", end=1.5, no_speech_prob=0.0, words=None),
+                ])
+                return segments, SimpleNamespace(language="zh", duration=2.0)
+        
+        module = ASRModule()
+        module._model = FakeFasterWhisper()
+        module._backend = "faster_whisper"
+        module._is_loaded = True
+        
+        result = module.transcribe("audio.wav")
+        
+        assert result.text == "x平方加一"
+        assert result.duration == 2.0
+        assert result.confidence == pytest.approx(0.9)
+        assert result.language == "zh"
+    
+    def test_transcribe_accepts_array(self):
+        """Test transcribe() forwards arrays to Whisper as contiguous float32."""
+        import numpy as np
+        
+        received = {}
+        
+        class FakeWhisper:
+            def transcribe(self, audio, **kwargs):
+                received["audio"] = audio
+                return {"text": "ok", "segments": []}
+        
+        module = ASRModule()
+        module._model = FakeWhisper()
+        module._is_loaded = True
+        
+        result = module.transcribe(np.zeros(32000, dtype=np.float64)[::2])
+        
+        assert received["audio"].dtype == np.float32
+        assert received["audio"].flags["C_CONTIGUOUS"]
+        assert result.text == "ok"
+    
+    def test_transcribe_many_batches_clips(self, monkeypatch):
+        """Test clips are padded, stacked and decoded in one whisper call."""
+        import sys
+        from types import SimpleNamespace
+        import numpy as np
+        
+        calls = []
+        
+        def decode(model, mel, options):
+            calls.append(mel.shape)
+            return [
+                SimpleNamespace(text=" 一 ", no_speech_prob=0.1, language="zh"),
+                SimpleNamespace(text=" 二 ", no_speech_prob=0.3, language="zh"),
+            ]
+        
+        fake_whisper = SimpleNamespace(
+            pad_or_trim=lambda audio: np.pad(audio, (0, 480000 - len(audio))),
+            log_mel_spectrogram=lambda batch, n_mels: SimpleNamespace(
+                shape=batch.shape, to=lambda device: SimpleNamespace(shape=batch.shape)
+            ),
+            DecodingOptions=lambda **kwargs: kwargs,
+            decode=decode,
+        )
+        monkeypatch.setitem(sys.modules, "whisper", fake_whisper)
+        
+        module = ASRModule()
+        module._model = SimpleNamespace(dims=SimpleNamespace(n_mels=80), device="cpu")
+        module._backend = "openai"
+        module._is_loaded = True
+        
+        results = module.transcribe_many([np.zeros(16000, np.float32), np.zeros(8000, np.float32)])
+        
+        assert calls == [(2, 480000)]
+        assert [r.text for r in results] == ["一", "二"]
+        assert [r.duration for r in results] == [1.0, 0.5]
+        assert results[1].confidence == pytest.approx(0.7)
+    
+    def test_model_shared_between_instances(self, monkeypatch):
+        """Test a second module with the same config reuses the loaded model."""
+        import sys
+        from types import SimpleNamespace
+        from backend.services import asr_module
+        
+        loads = []
+        
+        def load_model(size, device):
+            loads.append((size, device))
+            return object()
+        
+        monkeypatch.setattr(asr_module, "_MODEL_CACHE", {})
+        monkeypatch.setitem(sys.modules, "whisper", SimpleNamespace(load_model=load_model))
+        
+        config = ASRConfig(backend="openai")
+        first = ASRModule(config)
+        second = ASRModule(config)
+        first.load_model()
+        second.load_model()
+        ASRModule(ASRConfig(backend="openai", model_size=WhisperModelSize.TINY)).load_model()
+        
+        assert first._model is second._model
+        assert loads == [("small", "cpu"), ("tiny", "cpu")]
+    
+    def test_transcribe_many_empty(self):
+        """Test an empty batch returns no results without loading the model."""
+        module = ASRModule()
+        assert module.transcribe_many([]) == []
+        assert not module.is_loaded
 
 
 class TestMathSymbolPostProcessing:
@@ -258,6 +603,11 @@ class TestMathSymbolPostProcessing:
         assert "≥" in result
         assert "∈" in result
     
+    def test_longest_match_wins(self):
+        """Test overlapping phrases resolve to the longest mapping."""
+        assert ASRModule.post_process_math_symbols("a不等於b，c大於等於d") == "a≠b，c≥d"
+        assert ASRModule.post_process_math_symbols("三角形的角") == "△的∠"
+    
     def test_no_conversion_needed(self):
         """Test text that doesn't need conversion."""
         input_text = "這是一段普通的文字"
@@ -289,6 +639,89 @@ class TestSymbolToOralConversion:
         assert ASRModule.convert_symbols_to_oral("≥") == "大於等於"
         assert ASRModule.convert_symbols_to_oral("≤") == "小於等於"
 
+    
+    def test_simplified_to_traditional(self):
+        """Test simplified characters are converted before symbol mapping."""
+        assert ASRModule.convert_simplified_to_traditional("x大于3") == "x大於3"
+        assert ASRModule.convert_simplified_to_traditional("这个数学问题") == "這個數學問題"
+        assert ASRModule.convert_simplified_to_traditional("学习") == "學習"
+        assert ASRModule.convert_simplified_to_traditional("") == ""
+
+    def test_chinese_numbers_to_arabic(self):
+        """Test Chinese digits and 十 are converted to Arabic numerals."""
+        assert ASRModule.convert_chinese_numbers_to_arabic("十五") == "15"
+        assert ASRModule.convert_chinese_numbers_to_arabic("十") == "10"
+        assert ASRModule.convert_chinese_numbers_to_arabic("x加三等於零") == "x加3等於0"
+        assert ASRModule.convert_chinese_numbers_to_arabic("〇點五") == "0點5"
+
+    def test_full_post_process(self):
+        """Test math symbols are converted before the simplified text is translated."""
+        text = "x平方加上y等于圆周率，学习"
+        expected = "x²+y=π，學習"
+        assert ASRModule.full_post_process(text) == expected
+        assert ASRModule.full_post_process(text) == expected  # Cached
+        long_text = text * 40
+        assert ASRModule.full_post_process(long_text) == expected * 40
+
+
+class TestLLMCorrection:
+    """Tests for LLM-based transcription correction."""
+    
+    def test_correction_reuses_shared_client(self, monkeypatch):
+        """Test corrections go through the pooled client and return cleaned text."""
+        import httpx
+        from backend.services import asr_module
+        
+        requests_seen = []
+        
+        def handler(request):
+            requests_seen.append(request.url.path)
+            return httpx.Response(200, content=(
+                '{"response": "輸出：x平方", "done": false}\n'
+                '{"response": "加一。", "done": false}\n'
+                '{"response": "", "done": true}\n'
+            ))
+        
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(asr_module, "_OLLAMA_HTTP_CLIENT", client)
+        
+        first = ASRModule.llm_correct_transcription("x平方家一")
+        second = ASRModule.llm_correct_transcription("x平方家一")
+        
+        assert first == second == "x平方加一"
+        assert requests_seen == ["/api/generate", "/api/generate"]
+        assert asr_module._ollama_http_client() is client
+    
+    def test_correction_stops_after_first_answer_line(self, monkeypatch):
+        """Test streaming stops at the end of the answer line, ignoring later text."""
+        import httpx
+        from backend.services import asr_module
+        
+        def handler(request):
+            return httpx.Response(200, content=(
+                '{"response": "輸出：\\n", "done": false}\n'
+                '{"response": "x平方加一\\n", "done": false}\n'
+                '{"response": "解釋：把家改成加", "done": false}\n'
+            ))
+        
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(asr_module, "_OLLAMA_HTTP_CLIENT", client)
+        
+        assert ASRModule.llm_correct_transcription("x平方家一") == "x平方加一"
+    
+    def test_correction_falls_back_when_unavailable(self, monkeypatch):
+        """Test connection errors return the original text."""
+        import httpx
+        from backend.services import asr_module
+        
+        def handler(request):
+            raise httpx.ConnectError("refused")
+        
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(asr_module, "_OLLAMA_HTTP_CLIENT", client)
+        
+        assert ASRModule.llm_correct_transcription("x平方") == "x平方"
+
 
 class TestTranscriptionResult:
     """Tests for TranscriptionResult dataclass."""
@@ -331,6 +764,12 @@ class TestWordTimestamp:
         assert ts.word == "測試"
         assert ts.start_time == 0.0
         assert ts.end_time == 0.5
+    
+    def test_word_timestamp_is_hashable(self):
+        """Test identical word timestamps deduplicate in a set."""
+        ts1 = WordTimestamp(word="測試", start_time=0.0, end_time=0.5)
+        ts2 = WordTimestamp(word="測試", start_time=0.0, end_time=0.5)
+        assert len({ts1, ts2}) == 1
 
 
 class TestMathSymbolMappings:
@@ -355,3 +794,12 @@ class TestMathSymbolMappings:
         assert "√" in SYMBOL_TO_ORAL_MAPPINGS
         assert ">" in SYMBOL_TO_ORAL_MAPPINGS
         assert "=" in SYMBOL_TO_ORAL_MAPPINGS
+    
+    def test_reverse_mappings_derived_from_forward(self):
+        """Test every reverse symbol comes from the forward table and plain text is excluded."""
+        forward_symbols = set(MATH_SYMBOL_MAPPINGS.values())
+        assert set(SYMBOL_TO_ORAL_MAPPINGS) <= forward_symbols
+        assert SYMBOL_TO_ORAL_MAPPINGS["x²"] == "x平方"
+        assert SYMBOL_TO_ORAL_MAPPINGS["π"] == "圓周率"
+        assert "d" not in SYMBOL_TO_ORAL_MAPPINGS
+        assert "/" not in SYMBOL_TO_ORAL_MAPPINGS
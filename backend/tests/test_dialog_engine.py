@@ -15,6 +15,8 @@ from backend.services.dialog_engine import (
     ConversationTurn,
     SessionState,
     SessionSummary,
+    SessionNotFoundError,
+    SessionInactiveError,
 )
 from backend.services.fsm_controller import FSMController, FSMState, FSMEvent, FSMEventType
 from backend.services.rag_module import RAGModule, RetrievalResult, RetrievedDocument, ContentType
@@ -100,6 +102,10 @@ class TestTutoringSession:
         # Adding same concept again should not duplicate
         session.update_covered_concepts(["addition", "subtraction"])
         assert session.covered_concepts == ["addition", "subtraction"]
+        
+        # Malformed LLM output is skipped instead of breaking the turn
+        session.update_covered_concepts([{"name": "multiplication"}, "multiplication"])
+        assert session.covered_concepts == ["addition", "subtraction", "multiplication"]
     
     def test_calculate_concept_coverage(self):
         """Test concept coverage calculation."""
@@ -268,6 +274,142 @@ class TestDialogEngine:
         assert response.response_type == ResponseType.ACKNOWLEDGE
         assert "找不到" in response.text
     
+    def test_process_student_input_strict_missing_session(self, dialog_engine):
+        """Test strict processing raises for a non-existent session."""
+        input_data = StudentInput(
+            session_id="non-existent-session",
+            text="Hello"
+        )
+        
+        with pytest.raises(SessionNotFoundError):
+            dialog_engine.process_student_input(input_data, strict=True)
+    
+    def test_process_student_input_strict_ended_session(self, dialog_engine):
+        """Test strict processing raises for an ended session."""
+        session = dialog_engine.start_session(question_id="q1", student_id="s1")
+        dialog_engine.end_session(session.id)
+        
+        input_data = StudentInput(session_id=session.id, text="Hello")
+        
+        with pytest.raises(SessionInactiveError):
+            dialog_engine.process_student_input(input_data, strict=True)
+    
+    def test_fused_analysis_and_response_uses_one_call(
+        self, mock_fsm, mock_rag, mock_llm, mock_hint_controller
+    ):
+        """Test the fused mode takes analysis and reply from a single LLM call."""
+        engine = DialogEngine(
+            fsm_controller=mock_fsm,
+            rag_module=mock_rag,
+            llm_client=mock_llm,
+            hint_controller=mock_hint_controller,
+            fuse_analysis_and_response=True
+        )
+        mock_llm.generate.return_value = LLMResponse(
+            text='{"analysis": {"logic_gap": true, "covered_concepts": ["addition"]}, "response": "你怎麼知道要先加？"}',
+            model="test",
+            total_duration_ms=100
+        )
+        session = engine.start_session(
+            question_id="q1", student_id="s1", required_concepts=["addition"]
+        )
+        
+        response = engine.process_student_input(StudentInput(session_id=session.id, text="2+2=4"))
+        
+        assert mock_llm.generate.call_count == 1
+        assert response.text == "你怎麼知道要先加？"
+        analysis_event = mock_fsm.process_event.call_args_list[-1][0][0]
+        assert analysis_event.payload["logic_gap"] is True
+        assert analysis_event.payload["coverage"] == 1.0
+    
+    def test_fused_mode_falls_back_on_plain_text(
+        self, mock_fsm, mock_rag, mock_llm, mock_hint_controller
+    ):
+        """Test the fused mode uses the default analysis and a separate reply call when the reply is not JSON."""
+        engine = DialogEngine(
+            fsm_controller=mock_fsm,
+            rag_module=mock_rag,
+            llm_client=mock_llm,
+            hint_controller=mock_hint_controller,
+            fuse_analysis_and_response=True
+        )
+        mock_llm.generate.return_value = LLMResponse(
+            text="繼續說說看", model="test", total_duration_ms=100
+        )
+        session = engine.start_session(question_id="q1", student_id="s1")
+        
+        response = engine.process_student_input(StudentInput(session_id=session.id, text="2+2=4"))
+        
+        assert mock_llm.generate.call_count == 2
+        assert response.text == "繼續說說看"
+        analysis_event = mock_fsm.process_event.call_args_list[-1][0][0]
+        assert analysis_event.payload["continue_listening"] is True
+    
+    def test_fused_mode_accepts_fenced_json(
+        self, mock_fsm, mock_rag, mock_llm, mock_hint_controller
+    ):
+        """Test the fused mode parses a reply wrapped in a json code fence."""
+        engine = DialogEngine(
+            fsm_controller=mock_fsm,
+            rag_module=mock_rag,
+            llm_client=mock_llm,
+            hint_controller=mock_hint_controller,
+            fuse_analysis_and_response=True
+        )
+        mock_llm.generate.return_value = LLMResponse(
+            text='```json\n{"analysis": {"logic_gap": true}, "response": "為什麼？"}\n```',
+            model="test",
+            total_duration_ms=100
+        )
+        session = engine.start_session(question_id="q1", student_id="s1")
+        
+        response = engine.process_student_input(StudentInput(session_id=session.id, text="2+2=4"))
+        
+        assert mock_llm.generate.call_count == 1
+        assert response.text == "為什麼？"
+    
+    def test_retrieval_is_cached_per_query(
+        self, mock_fsm, mock_rag, mock_llm, mock_hint_controller
+    ):
+        """Test repeated queries reuse retrieved documents with LRU eviction."""
+        engine = DialogEngine(
+            fsm_controller=mock_fsm,
+            rag_module=mock_rag,
+            llm_client=mock_llm,
+            hint_controller=mock_hint_controller,
+            rag_cache_size=1
+        )
+        session = engine.start_session(question_id="q1", student_id="s1")
+        
+        engine._retrieve_context("X = 5", session)
+        engine._retrieve_context("  x = 5 ", session)
+        assert mock_rag.retrieve.call_count == 1
+        
+        engine._retrieve_context("x = 6", session)  # Evicts "x = 5"
+        engine._retrieve_context("x = 5", session)
+        assert mock_rag.retrieve.call_count == 3
+    
+    def test_turn_holds_fsm_lock(self, dialog_engine, mock_llm):
+        """Test a turn keeps other threads off the shared FSM until it finishes."""
+        import threading
+
+        session = dialog_engine.start_session(question_id="q1", student_id="s1")
+        response = mock_llm.generate.return_value
+        lock_free = []
+
+        def generate(**kwargs):
+            probe = threading.Thread(
+                target=lambda: lock_free.append(dialog_engine._fsm_lock.acquire(timeout=0.05))
+            )
+            probe.start()
+            probe.join()
+            return response
+
+        mock_llm.generate.side_effect = generate
+        dialog_engine.process_student_input(StudentInput(session_id=session.id, text="2+2=4"))
+
+        assert lock_free and not any(lock_free)
+
     def test_hint_request_detection(self, dialog_engine):
         """Test detection of hint requests."""
         # Test various hint request phrases
@@ -276,6 +418,7 @@ class TestDialogEngine:
         assert dialog_engine._is_hint_request("幫幫我") is True
         assert dialog_engine._is_hint_request("我卡住了") is True
         assert dialog_engine._is_hint_request("hint please") is True
+        assert dialog_engine._is_hint_request("HELP me") is True
         
         # Test non-hint requests
         assert dialog_engine._is_hint_request("答案是4") is False
@@ -357,6 +500,13 @@ class TestDialogEngine:
         assert state.student_id == "s1"
         assert state.is_active is True
     
+    def test_session_exists(self, dialog_engine):
+        """Test checking session existence."""
+        session = dialog_engine.start_session(question_id="q1", student_id="s1")
+        
+        assert dialog_engine.session_exists(session.id) is True
+        assert dialog_engine.session_exists("non-existent-session") is False
+    
     def test_get_session_state_invalid(self, dialog_engine):
         """Test getting state for non-existent session."""
         state = dialog_engine.get_session_state("non-existent-session")
@@ -87,6 +87,13 @@ class TestOllamaClient:
         assert payload["options"]["temperature"] == 0.5
         assert payload["options"]["num_predict"] == 100
     
+    def test_build_payload_keep_alive(self):
+        """Test the model keep-alive is sent and can be disabled."""
+        assert OllamaClient()._build_payload("Hello")["keep_alive"] == "30m"
+        
+        client = OllamaClient(config=LLMConfig(keep_alive=None))
+        assert "keep_alive" not in client._build_payload("Hello")
+    
     def test_fallback_response(self):
         """Test fallback response generation."""
         config = LLMConfig(fallback_response="Fallback text")
@@ -115,7 +115,7 @@ class TestBuildSystemPrompt:
             assert f"Level {level.value}" in prompt
     
     def test_with_rag_context(self):
-        """Test system prompt with RAG documents."""
+        """Test RAG documents go to the user prompt, not the system prompt."""
         builder = PromptBuilder()
         
         rag_docs = [
@@ -126,13 +126,18 @@ class TestBuildSystemPrompt:
                 similarity=0.9
             )
         ]
-        context = PromptContext(rag_documents=rag_docs)
+        context = PromptContext(
+            question_content="Solve x + 5 = 10",
+            rag_documents=rag_docs,
+            conversation_history=[{"speaker": "STUDENT", "content": "x = 5"}]
+        )
         
-        prompt = builder.build_system_prompt(FSMState.LISTENING, context)
+        system, user = builder.build_full_prompt(FSMState.LISTENING, context)
         
-        assert "參考資料" in prompt
-        assert "解法" in prompt
-        assert "This is a solution" in prompt
+        assert "This is a solution" not in system
+        assert "參考資料" in user
+        assert "解法" in user
+        assert user.index("Solve x + 5 = 10") < user.index("This is a solution") < user.index("學生：x = 5")
 
 
 class TestBuildUserPrompt:
@@ -303,6 +308,25 @@ class TestFormatRAGContext:
         assert "Content 1" in result
         assert "Content 2" in result
         assert "Content 3" not in result
+    
+    def test_same_documents_format_identically(self):
+        """Test retrieval order does not change the formatted references."""
+        builder = PromptBuilder()
+        docs = [
+            RetrievedDocument(
+                id=doc_id,
+                content=f"Content {doc_id}",
+                content_type=ContentType.CONCEPT,
+                similarity=similarity
+            )
+            for doc_id, similarity in [("b", 0.9), ("a", 0.8), ("c", 0.1)]
+        ]
+        
+        result = builder._format_rag_context(docs, max_docs=2)
+        
+        assert result == builder._format_rag_context([docs[1], docs[0]], max_docs=2)
+        assert result.index("Content a") < result.index("Content b")
+        assert "Content c" not in result
 
 
 class TestInjectRAGContext:
@@ -367,6 +391,42 @@ class TestAnalysisPrompt:
         assert "x = 10 - 5 = 5" in user
 
 
+class TestAnalysisAndResponsePrompt:
+    """Tests for build_analysis_and_response_prompt method."""
+    
+    def test_combined_prompt_asks_for_both_fields(self):
+        """Test the combined prompt requests analysis and reply in one JSON object."""
+        builder = PromptBuilder()
+        context = PromptContext(
+            question_content="Solve x + 5 = 10",
+            student_input="x = 5",
+            conversation_history=[{"speaker": "STUDENT", "content": "x = 5"}],
+            rag_documents=[
+                RetrievedDocument(
+                    id="doc1",
+                    content="Subtract 5 from both sides",
+                    content_type=ContentType.SOLUTION,
+                    similarity=0.9
+                )
+            ]
+        )
+        
+        system, user = builder.build_analysis_and_response_prompt(
+            context=context,
+            standard_solution="x = 10 - 5 = 5"
+        )
+        
+        assert '"analysis"' in system
+        assert '"response"' in system
+        assert "logic_complete" in system
+        assert "絕對禁止事項" in system
+        assert "Solve x + 5 = 10" in user
+        assert "學生：x = 5" in user
+        assert "x = 10 - 5 = 5" in user
+        assert "Subtract 5 from both sides" not in system
+        assert user.index("x = 10 - 5 = 5") < user.index("Subtract 5 from both sides") < user.index("學生：x = 5")
+
+
 class TestMisconceptionCheckPrompt:
     """Tests for get_misconception_check_prompt method."""
     